@@ -0,0 +1,280 @@
+import argparse
+import contextlib
+import json
+import os
+import random
+import resource
+import tempfile
+import time
+import tracemalloc
+
+from generate_content import generate_pages_recursive
+from inline_markdown import text_to_textnodes
+from markdown_blocks import markdown_to_blocks, markdown_to_html_node
+
+SHAPES = {
+    "mixed": {
+        "depth": 2,
+        "blocks": 20,
+        "paragraph_words": 60,
+        "emphasis": 0.1,
+        "links": 0.05,
+        "code_lines": 8,
+    },
+    "deep": {
+        "depth": 8,
+        "blocks": 10,
+        "paragraph_words": 40,
+        "emphasis": 0.05,
+        "links": 0.02,
+        "code_lines": 4,
+    },
+    "long_paragraphs": {
+        "depth": 1,
+        "blocks": 10,
+        "paragraph_words": 2000,
+        "emphasis": 0.02,
+        "links": 0.01,
+        "code_lines": 0,
+    },
+    "emphasis": {
+        "depth": 1,
+        "blocks": 20,
+        "paragraph_words": 200,
+        "emphasis": 0.5,
+        "links": 0.0,
+        "code_lines": 0,
+    },
+    "links": {
+        "depth": 1,
+        "blocks": 20,
+        "paragraph_words": 200,
+        "emphasis": 0.0,
+        "links": 0.4,
+        "code_lines": 0,
+    },
+    "code": {
+        "depth": 1,
+        "blocks": 10,
+        "paragraph_words": 20,
+        "emphasis": 0.0,
+        "links": 0.0,
+        "code_lines": 400,
+    },
+}
+
+WORDS = (
+    "the ring of power was forged in the fires of mount doom by sauron "
+    "who sought to rule over all the free peoples of middle earth"
+).split()
+
+TEMPLATE = (
+    "<html><head><title>{{ Title }}</title></head><body>{{ Content }}</body></html>"
+)
+
+
+def make_inline_text(rng, words, shape):
+    parts = []
+    for _ in range(words):
+        word = rng.choice(WORDS)
+        roll = rng.random()
+        if roll < shape["emphasis"] / 3:
+            word = f"**{word}**"
+        elif roll < shape["emphasis"] * 2 / 3:
+            word = f"*{word}*"
+        elif roll < shape["emphasis"]:
+            word = f"`{word}`"
+        elif roll < shape["emphasis"] + shape["links"] / 2:
+            word = f"[{word}](/{word})"
+        elif roll < shape["emphasis"] + shape["links"]:
+            word = f"![{word}](/images/{word}.png)"
+        parts.append(word)
+    return " ".join(parts)
+
+
+def make_page(rng, shape, title):
+    blocks = [f"# {title}"]
+    for i in range(shape["blocks"]):
+        kind = i % 6
+        if kind == 0:
+            blocks.append(f"## {make_inline_text(rng, 5, shape)}")
+        elif kind == 1 and shape["code_lines"]:
+            code = "\n".join(
+                f"    {make_inline_text(rng, 6, SHAPES['code'])}"
+                for _ in range(shape["code_lines"])
+            )
+            blocks.append(f"```\n{code}\n```")
+        elif kind == 2:
+            quote = make_inline_text(rng, shape["paragraph_words"], shape)
+            blocks.append(f"> {quote}")
+        elif kind == 3:
+            blocks.append(
+                "\n".join(f"* {make_inline_text(rng, 8, shape)}" for _ in range(5))
+            )
+        elif kind == 4:
+            blocks.append(
+                "\n".join(
+                    f"{n}. {make_inline_text(rng, 8, shape)}" for n in range(1, 6)
+                )
+            )
+        else:
+            blocks.append(make_inline_text(rng, shape["paragraph_words"], shape))
+    return "\n\n".join(blocks) + "\n"
+
+
+def generate_corpus(root, pages, shape_name="mixed", seed=0):
+    shape = SHAPES[shape_name]
+    rng = random.Random(seed)
+    paths = []
+    for i in range(pages):
+        depth = rng.randint(0, shape["depth"])
+        dirs = [f"section{rng.randrange(4)}" for _ in range(depth)]
+        page_dir = os.path.join(root, *dirs)
+        os.makedirs(page_dir, exist_ok=True)
+        path = os.path.join(page_dir, f"page{i}.md")
+        with open(path, "w") as f:
+            f.write(make_page(rng, shape, f"Page {i}"))
+        paths.append(path)
+    return paths
+
+
+def time_stage(func, items):
+    start = time.perf_counter()
+    for item in items:
+        func(item)
+    return time.perf_counter() - start
+
+
+def measure_memory(documents):
+    tracemalloc.start()
+    try:
+        html_nodes = [markdown_to_html_node(document) for document in documents]
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del html_nodes
+    return {
+        "peak_traced_mb": peak / 1e6,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3,
+    }
+
+
+def run_benchmark(pages, shape_name, seed=0, memory=False):
+    with tempfile.TemporaryDirectory() as tmp:
+        content_dir = os.path.join(tmp, "content")
+        public_dir = os.path.join(tmp, "public")
+        template_path = os.path.join(tmp, "template.html")
+        with open(template_path, "w") as f:
+            f.write(TEMPLATE)
+
+        paths = generate_corpus(content_dir, pages, shape_name, seed)
+        documents = []
+        for path in paths:
+            with open(path) as f:
+                documents.append(f.read())
+        total_bytes = sum(len(document.encode()) for document in documents)
+        blocks = [
+            block for document in documents for block in markdown_to_blocks(document)
+        ]
+        html_nodes = [markdown_to_html_node(document) for document in documents]
+
+        timings = {
+            "markdown_to_blocks": time_stage(markdown_to_blocks, documents),
+            "text_to_textnodes": time_stage(text_to_textnodes, blocks),
+            "markdown_to_html_node": time_stage(markdown_to_html_node, documents),
+            "to_html": time_stage(lambda node: node.to_html(), html_nodes),
+        }
+        start = time.perf_counter()
+        generate_pages_recursive(content_dir, template_path, public_dir)
+        timings["generate_pages_recursive"] = time.perf_counter() - start
+        if memory:
+            del html_nodes
+            memory_usage = measure_memory(documents)
+
+    results = {}
+    for stage, seconds in timings.items():
+        results[stage] = {
+            "seconds": seconds,
+            "pages_per_second": pages / seconds if seconds else float("inf"),
+            "mb_per_second": total_bytes / 1e6 / seconds if seconds else float("inf"),
+        }
+    result = {
+        "shape": shape_name,
+        "pages": pages,
+        "bytes": total_bytes,
+        "stages": results,
+    }
+    if memory:
+        result["memory"] = memory_usage
+    return result
+
+
+def print_report(result, previous=None):
+    print(
+        f"{result['shape']}: {result['pages']} pages, "
+        f"{result['bytes'] / 1e6:.2f} MB of markdown"
+    )
+    for stage, stats in result["stages"].items():
+        line = (
+            f"  {stage:<26} {stats['seconds']:8.3f}s "
+            f"{stats['pages_per_second']:10.1f} pages/s "
+            f"{stats['mb_per_second']:8.2f} MB/s"
+        )
+        if previous is not None and stage in previous["stages"]:
+            ratio = previous["stages"][stage]["seconds"] / stats["seconds"]
+            line += f"  {ratio:5.2f}x vs baseline"
+        print(line)
+    if "memory" in result:
+        line = (
+            f"  {'peak node tree memory':<26} "
+            f"{result['memory']['peak_traced_mb']:8.2f} MB traced "
+            f"{result['memory']['max_rss_mb']:8.2f} MB max RSS"
+        )
+        if previous is not None and "memory" in previous:
+            ratio = (
+                result["memory"]["peak_traced_mb"]
+                / previous["memory"]["peak_traced_mb"]
+            )
+            line += f"  {ratio:5.2f}x of baseline"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the site build")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument(
+        "--shape", choices=sorted(SHAPES), action="append", dest="shapes"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="also measure peak memory while building node trees",
+    )
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--compare", help="JSON results from an earlier run")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {result["shape"]: result for result in json.load(f)}
+
+    # Page generation prints a line per page; keep the report readable.
+    with open(os.devnull, "w") as devnull:
+        results = []
+        for shape_name in args.shapes or sorted(SHAPES):
+            with contextlib.redirect_stdout(devnull):
+                result = run_benchmark(
+                    args.pages, shape_name, args.seed, args.memory
+                )
+            print_report(result, baseline.get(shape_name))
+            results.append(result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import hashlib
+import os
+import tempfile
+from collections import OrderedDict
+
+# Bump whenever block rendering changes so on-disk entries from older builds
+# are never reused.
+CACHE_VERSION = "1"
+
+
+class BlockCache:
+    def __init__(self, maxsize=4096, path=None):
+        self.maxsize = maxsize
+        self.path = path
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def key(self, block_text):
+        data = f"{CACHE_VERSION}\0{block_text}".encode()
+        return hashlib.sha256(data).hexdigest()
+
+    def _disk_path(self, key):
+        return os.path.join(self.path, key[:2], f"{key}.html")
+
+    def get(self, key):
+        html = self.entries.get(key)
+        if html is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return html
+        if self.path is not None:
+            try:
+                with open(self._disk_path(key)) as f:
+                    html = f.read()
+            except FileNotFoundError:
+                pass
+            else:
+                self._remember(key, html)
+                self.hits += 1
+                self.disk_hits += 1
+                return html
+        self.misses += 1
+        return None
+
+    def put(self, key, html):
+        self._remember(key, html)
+        if self.path is None:
+            return
+        disk_path = self._disk_path(key)
+        if os.path.exists(disk_path):
+            return
+        os.makedirs(os.path.dirname(disk_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(disk_path))
+        with os.fdopen(fd, "w") as f:
+            f.write(html)
+        os.replace(tmp_path, disk_path)
+
+    def _remember(self, key, html):
+        self.entries[key] = html
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def render(self, lines, render_block):
+        key = self.key("\n".join(lines))
+        html = self.get(key)
+        if html is None:
+            html = render_block(lines).to_html()
+            self.put(key, html)
+        return html
+
+    def take_counts(self):
+        counts = (self.hits, self.disk_hits, self.misses)
+        self.hits = self.disk_hits = self.misses = 0
+        return counts
+
+    def add_counts(self, counts):
+        hits, disk_hits, misses = counts
+        self.hits += hits
+        self.disk_hits += disk_hits
+        self.misses += misses
+
+    def summary(self):
+        lookups = self.hits + self.misses
+        hit_rate = self.hits / lookups if lookups else 0.0
+        return (
+            f"Block cache: {self.hits} hits ({self.disk_hits} from disk), "
+            f"{self.misses} misses, {hit_rate:.1%} hit rate"
+        )
+
+
+active_cache = None
+
+
+def configure(maxsize=4096, path=None):
+    global active_cache
+    active_cache = BlockCache(maxsize, path)
+    return active_cache
+
+
+def disable():
+    global active_cache
+    active_cache = None
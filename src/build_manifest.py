@@ -0,0 +1,81 @@
+import hashlib
+import json
+import os
+
+
+def hash_file(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class BuildManifest:
+    def __init__(self, pages=None, assets=None, options=None):
+        self.pages = pages if pages is not None else {}
+        self.assets = assets if assets is not None else []
+        # Build settings that change page output, such as minification.
+        self.options = options if options is not None else {}
+        self.seen_sources = set()
+        self._hashes = {}
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls()
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data.get("pages", {}), data.get("assets", []))
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(
+                {"pages": self.pages, "assets": self.assets},
+                f,
+                indent=2,
+                sort_keys=True,
+            )
+
+    def file_hash(self, path):
+        if path not in self._hashes:
+            self._hashes[path] = hash_file(path)
+        return self._hashes[path]
+
+    def asset_hash(self, path):
+        try:
+            return self.file_hash(path)
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+            return None
+
+    def is_current(self, from_path, template_path, dest_path):
+        self.seen_sources.add(from_path)
+        entry = self.pages.get(from_path)
+        return (
+            entry is not None
+            and entry["dest_path"] == dest_path
+            and entry["template_hash"] == self.file_hash(template_path)
+            and entry["source_hash"] == self.file_hash(from_path)
+            and entry.get("options", {}) == self.options
+            and all(
+                self.asset_hash(path) == asset_hash
+                for path, asset_hash in entry.get("assets", {}).items()
+            )
+            and os.path.exists(dest_path)
+        )
+
+    def record(self, from_path, template_path, dest_path, assets=()):
+        self.seen_sources.add(from_path)
+        self.pages[from_path] = {
+            "source_hash": self.file_hash(from_path),
+            "template_hash": self.file_hash(template_path),
+            "dest_path": dest_path,
+            "options": self.options,
+            # Files read while rendering the page, such as images whose
+            # size ends up in the HTML.
+            "assets": {path: self.asset_hash(path) for path in assets},
+        }
+
+    def remove_stale_pages(self):
+        for from_path in sorted(set(self.pages) - self.seen_sources):
+            dest_path = self.pages.pop(from_path)["dest_path"]
+            if os.path.exists(dest_path):
+                print(f"Deleting {dest_path}")
+                os.remove(dest_path)
@@ -0,0 +1,102 @@
+import gzip
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from output_writer import write_atomic
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = frozenset(
+    [".css", ".html", ".js", ".json", ".svg", ".txt", ".xml"]
+)
+SIDECAR_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+def available_encodings():
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data)
+    # A fixed mtime keeps the output identical for identical input.
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def sidecar_is_current(path, sidecar_path):
+    # Sidecars carry the mtime of the file they were made from.
+    try:
+        return os.stat(sidecar_path).st_mtime_ns == os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+def compress_file(path, encodings):
+    written = skipped = 0
+    data = None
+    stat = os.stat(path)
+    for encoding in encodings:
+        sidecar_path = path + SIDECAR_SUFFIXES[encoding]
+        if sidecar_is_current(path, sidecar_path):
+            skipped += 1
+            continue
+        if data is None:
+            with open(path, "rb") as f:
+                data = f.read()
+        compressed = compress(data, encoding)
+        if len(compressed) >= len(data):
+            if os.path.exists(sidecar_path):
+                os.remove(sidecar_path)
+            continue
+        write_atomic(sidecar_path, compressed)
+        os.utime(sidecar_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        written += 1
+    return written, skipped
+
+
+def find_compressible(dest_dir):
+    paths = []
+    suffixes = tuple(SIDECAR_SUFFIXES.values())
+    for dir_path, _, file_names in os.walk(dest_dir):
+        for file_name in sorted(file_names):
+            path = os.path.join(dir_path, file_name)
+            stem, ext = os.path.splitext(path)
+            # Only files like page.html.gz are sidecars; data.tar.gz is not.
+            if ext in suffixes and os.path.splitext(stem)[1] in COMPRESSIBLE_EXTENSIONS:
+                if not os.path.exists(stem):
+                    print(f"Deleting {path}")
+                    os.remove(path)
+            elif ext in COMPRESSIBLE_EXTENSIONS:
+                paths.append(path)
+    return paths
+
+
+class CompressStats:
+    def __init__(self):
+        self.written = 0
+        self.skipped = 0
+
+    def summary(self):
+        return (
+            f"Compressed {self.written} sidecar files, "
+            f"skipped {self.skipped} up to date"
+        )
+
+
+stats = CompressStats()
+
+
+def compress_outputs(dest_dir, workers=None, encodings=None):
+    encodings = encodings or available_encodings()
+    paths = find_compressible(dest_dir)
+    # zlib and brotli release the GIL while compressing, so threads suffice.
+    with ThreadPoolExecutor(workers) as executor:
+        for written, skipped in executor.map(
+            lambda path: compress_file(path, encodings), paths
+        ):
+            stats.written += written
+            stats.skipped += skipped
+    return stats
@@ -0,0 +1,168 @@
+import argparse
+import json
+import os
+from urllib.parse import unquote, urlsplit
+
+from textnode import TextType, text_to_html_node
+
+GRAPH_PATH = ".build_graph.json"
+
+
+class PageReferences:
+    def __init__(self):
+        self.links = []
+        self.assets = []
+        self.line = None
+
+    def make_node(self, text, text_type, url=None):
+        # Used as the inline tokenizer's node factory while a page renders.
+        if text_type is TextType.LINK and is_internal(url):
+            self.links.append((url, self.line))
+        elif text_type is TextType.IMAGE and is_internal(url):
+            self.assets.append((url, self.line))
+        return text_to_html_node(text, text_type, url)
+
+
+def is_internal(target):
+    if not target or target.startswith("#"):
+        return False
+    parts = urlsplit(target)
+    return not parts.scheme and not parts.netloc
+
+
+def resolve_target(target, dest_path, dest_dir):
+    path = unquote(urlsplit(target).path)
+    if path.startswith("/"):
+        return os.path.normpath(os.path.join(dest_dir, path.lstrip("/")))
+    return os.path.normpath(os.path.join(os.path.dirname(dest_path), path))
+
+
+def output_candidates(path):
+    # "/majesty" may be served as majesty.html or majesty/index.html.
+    return (path, f"{path}.html", os.path.join(path, "index.html"))
+
+
+def link_paths_for(dest_path):
+    paths = {dest_path}
+    root, ext = os.path.splitext(dest_path)
+    if ext == ".html":
+        paths.add(root)
+        if os.path.basename(root) == "index":
+            paths.add(os.path.dirname(root))
+    return paths
+
+
+def is_within(path, directory):
+    # commonpath cannot compare relative paths with absolute ones.
+    directory = os.path.abspath(directory)
+    return os.path.commonpath([os.path.abspath(path), directory]) == directory
+
+
+class DependencyGraph:
+    def __init__(self, content_dir, static_dir, dest_dir, pages=None):
+        self.content_dir = os.path.normpath(content_dir)
+        self.static_dir = os.path.normpath(static_dir)
+        self.dest_dir = os.path.normpath(dest_dir)
+        self.pages = pages if pages is not None else {}
+
+    @classmethod
+    def load(cls, path, content_dir, static_dir, dest_dir):
+        if not os.path.exists(path):
+            return cls(content_dir, static_dir, dest_dir)
+        with open(path) as f:
+            data = json.load(f)
+        return cls(content_dir, static_dir, dest_dir, data.get("pages", {}))
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump({"pages": self.pages}, f, indent=2, sort_keys=True)
+
+    def add_page(self, from_path, template_path, dest_path, references):
+        dest_path = os.path.normpath(dest_path)
+        self.pages[os.path.normpath(from_path)] = {
+            "template": os.path.normpath(template_path),
+            "dest_path": dest_path,
+            "links": self._resolve(references.links, dest_path),
+            "assets": self._resolve(references.assets, dest_path),
+        }
+
+    def _resolve(self, targets, dest_path):
+        return [
+            {
+                "target": target,
+                "path": resolve_target(target, dest_path, self.dest_dir),
+                "line": line,
+            }
+            for target, line in targets
+        ]
+
+    def prune(self):
+        for from_path in [path for path in self.pages if not os.path.exists(path)]:
+            del self.pages[from_path]
+
+    def dest_path_for(self, path):
+        if is_within(path, self.content_dir):
+            entry = self.pages.get(path)
+            if entry is not None:
+                return entry["dest_path"]
+            name, _ = os.path.splitext(os.path.relpath(path, self.content_dir))
+            return os.path.join(self.dest_dir, f"{name}.html")
+        if is_within(path, self.static_dir):
+            return os.path.join(self.dest_dir, os.path.relpath(path, self.static_dir))
+        return None
+
+    def referrers(self):
+        index = {}
+        for from_path, entry in self.pages.items():
+            for reference in entry["links"] + entry["assets"]:
+                index.setdefault(reference["path"], set()).add(from_path)
+        return index
+
+    def normalize(self, path):
+        # Changed paths are compared with the stored ones, so give them the
+        # same relative or absolute form as the graph's directories.
+        if os.path.isabs(self.content_dir):
+            return os.path.abspath(path)
+        return os.path.relpath(path)
+
+    def affected_pages(self, changed_paths):
+        changed = {self.normalize(path) for path in changed_paths}
+        affected = set()
+        for from_path, entry in self.pages.items():
+            if from_path in changed or entry["template"] in changed:
+                affected.add(from_path)
+
+        # Pages only depend directly on what they link to; re-rendering a
+        # referrer never changes what other pages read from it.
+        referrers = self.referrers()
+        for path in changed:
+            if is_within(path, self.content_dir) and os.path.isfile(path):
+                affected.add(path)
+            dest_path = self.dest_path_for(path)
+            if dest_path is None:
+                continue
+            for link_path in link_paths_for(dest_path):
+                affected.update(referrers.get(link_path, ()))
+        return sorted(affected)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Print the pages to re-render after files change"
+    )
+    parser.add_argument("changed", nargs="+", help="changed source files")
+    parser.add_argument("--graph", default=GRAPH_PATH)
+    parser.add_argument("--content", default="content")
+    parser.add_argument("--static", default="static")
+    parser.add_argument("--dest", default="public")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.graph):
+        parser.error(f"{args.graph} not found; build with --dependency-graph first")
+    graph = DependencyGraph.load(args.graph, args.content, args.static, args.dest)
+    for from_path in graph.affected_pages(args.changed):
+        print(from_path)
+
+
+if __name__ == "__main__":
+    main()
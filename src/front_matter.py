@@ -0,0 +1,169 @@
+import datetime
+from collections import namedtuple
+
+DELIMITER = "---"
+
+PageMetadata = namedtuple(
+    "PageMetadata",
+    ["from_path", "dest_path", "title", "date", "tags", "draft", "fields"],
+)
+
+
+def parse_value(text):
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'":
+        return text[1:-1]
+    if text.startswith("[") and text.endswith("]"):
+        return [parse_value(item) for item in text[1:-1].split(",") if item.strip()]
+    if text.lower() in ("true", "false"):
+        return text.lower() == "true"
+    try:
+        return datetime.date.fromisoformat(text)
+    except ValueError:
+        return text
+
+
+def parse_front_matter(lines):
+    fields = {}
+    key = None
+    for number, line in enumerate(lines, 2):
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        if line.lstrip().startswith("- ") and isinstance(fields.get(key), list):
+            fields[key].append(parse_value(line.lstrip()[2:]))
+            continue
+        key, separator, value = line.partition(":")
+        key = key.strip()
+        if not separator or not key or line[0].isspace():
+            raise ValueError(f"Invalid front matter on line {number}: {line!r}")
+        # A key with no value starts a "- item" list on the following lines.
+        fields[key] = parse_value(value) if value.strip() else []
+    return fields
+
+
+def read_front_matter(f):
+    first = f.readline()
+    if first.rstrip("\n") != DELIMITER:
+        f.seek(0)
+        return {}, 0
+    lines = []
+    for line in iter(f.readline, ""):
+        line = line.rstrip("\n")
+        if line == DELIMITER:
+            return parse_front_matter(lines), len(lines) + 2
+        lines.append(line)
+    raise ValueError("Front matter is missing its closing ---")
+
+
+def split_front_matter(markdown):
+    if not markdown.startswith(DELIMITER + "\n"):
+        return {}, markdown
+    end = markdown.find(f"\n{DELIMITER}\n", len(DELIMITER))
+    if end == -1:
+        if not markdown.endswith(f"\n{DELIMITER}"):
+            raise ValueError("Front matter is missing its closing ---")
+        end = len(markdown) - len(DELIMITER) - 1
+    lines = markdown[len(DELIMITER) + 1 : end].split("\n")
+    fields = parse_front_matter(lines) if end > len(DELIMITER) else {}
+    return fields, markdown[end + len(DELIMITER) + 2 :]
+
+
+def title_from_lines(fields, lines):
+    if fields.get("title"):
+        return str(fields["title"])
+    for line in lines:
+        if line.startswith("# "):
+            return line.strip("#").strip()
+    return None
+
+
+def as_list(value):
+    if value is None:
+        return []
+    return [str(item) for item in (value if isinstance(value, list) else [value])]
+
+
+def format_value(value):
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, list):
+        return ", ".join(map(format_value, value))
+    return "" if value is None else str(value)
+
+
+def template_values(fields):
+    # Every field fills both {{ author }} and {{ Author }}; Date and Tags are
+    # always set so templates using them render on pages without them.
+    values = {"Date": "", "Tags": ""}
+    for key, value in fields.items():
+        values[key] = values[key[:1].upper() + key[1:]] = format_value(value)
+    return values
+
+
+def read_page_metadata(from_path, dest_path):
+    with open(from_path) as f:
+        fields, _ = read_front_matter(f)
+        # Without a title field, read on only as far as the first heading.
+        title = title_from_lines(fields, (line.rstrip("\n") for line in f))
+    return PageMetadata(
+        from_path,
+        dest_path,
+        title,
+        fields.get("date"),
+        as_list(fields.get("tags")),
+        fields.get("draft") is True,
+        fields,
+    )
+
+
+def sort_key(page):
+    # Newest first; undated pages follow in path order.
+    date = page.date if isinstance(page.date, datetime.date) else None
+    return (date is None, -(date.toordinal() if date else 0), page.from_path)
+
+
+class MetadataIndex:
+    # Front matter is read the first time a page is looked up, so a build
+    # that skips every page reads none of it.
+    def __init__(self, pages=()):
+        self.dest_paths = dict(pages)
+        self.by_path = {}
+
+    def get(self, from_path):
+        page = self.by_path.get(from_path)
+        if page is None:
+            page = read_page_metadata(from_path, self.dest_paths.get(from_path))
+            self.by_path[from_path] = page
+        return page
+
+    def pages(self, drafts=False):
+        pages = (self.get(from_path) for from_path in self.dest_paths)
+        return sorted(
+            (page for page in pages if drafts or not page.draft), key=sort_key
+        )
+
+    def tags(self, drafts=False):
+        tags = {}
+        for page in self.pages(drafts):
+            for tag in page.tags:
+                tags.setdefault(tag, []).append(page)
+        return dict(sorted(tags.items()))
+
+    def tagged(self, tag, drafts=False):
+        return [page for page in self.pages(drafts) if tag in page.tags]
+
+
+include_drafts = False
+active_index = None
+
+
+def is_draft(from_path):
+    try:
+        if active_index is not None:
+            return active_index.get(from_path).draft
+        return read_page_metadata(from_path, None).draft
+    except (OSError, ValueError):
+        # Rendering the page reports the error.
+        return False
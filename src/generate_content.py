@@ -1,21 +1,45 @@
+import contextlib
+import io
 import os
 import shutil
+from concurrent.futures import ProcessPoolExecutor
 
-from markdown_blocks import markdown_to_html_node
+import block_cache
+import front_matter
+import image_pipeline
+import minify
+import output_writer
+import profiling
+from build_manifest import hash_file
+from dependency_graph import PageReferences
+from front_matter import (
+    read_front_matter,
+    split_front_matter,
+    template_values,
+    title_from_lines,
+)
+from markdown_blocks import MarkdownHTMLStream, markdown_to_html_node
+from template import load_template
 
+# Sources at least this large are rendered block by block straight into the
+# output file instead of being parsed into a full node tree first.
+STREAM_THRESHOLD_BYTES = 1_000_000
 
-def delete_dir_contents(dir):
+
+def delete_dir_contents(dir, keep=()):
     for item in os.listdir(dir):
         path = os.path.join(dir, item)
-        if os.path.isfile(path):
+        if os.path.isfile(path) and os.path.normpath(path) not in keep:
             print(f"Deleting {path}")
             os.remove(path)
 
 
-def copy_dir(source, destination):
-
+def copy_dir(source, destination, keep=()):
+    # Files in keep, such as rendered pages, are left for the page build,
+    # which only rewrites them when their HTML changes.
+    keep = {os.path.normpath(path) for path in keep}
     if os.path.exists(destination):
-        delete_dir_contents(destination)
+        delete_dir_contents(destination, keep)
     else:
         os.mkdir(destination)
 
@@ -24,45 +48,376 @@ def copy_dir(source, destination):
         destination_path = os.path.join(destination, item)
         print(f"Copying {source_path} -> {destination_path}")
         if os.path.isfile(source_path):
-            shutil.copy(source_path, destination_path)
+            if is_minified_css(source_path):
+                write_minified_css(source_path, destination_path)
+            else:
+                shutil.copy(source_path, destination_path)
+        elif os.path.isdir(source_path):
+            copy_dir(source_path, destination_path, keep)
+
+
+def files_match(source_path, destination_path, compare_hash=False):
+    try:
+        destination_stat = os.stat(destination_path)
+    except FileNotFoundError:
+        return False
+    source_stat = os.stat(source_path)
+    if os.path.samestat(source_stat, destination_stat):
+        return True
+    if source_stat.st_size != destination_stat.st_size:
+        return False
+    if compare_hash:
+        return hash_file(source_path) == hash_file(destination_path)
+    return source_stat.st_mtime_ns == destination_stat.st_mtime_ns
+
+
+def copy_file(source_path, destination_path, link=False):
+    # Unlink first so a previously hardlinked destination never writes
+    # through to its source.
+    if os.path.lexists(destination_path):
+        os.remove(destination_path)
+    if link:
+        try:
+            os.link(source_path, destination_path)
+            return
+        except OSError:
+            pass
+    # copy2 keeps the source mtime for the next comparison, and on Linux
+    # shutil copies with os.sendfile without passing data through Python.
+    shutil.copy2(source_path, destination_path)
+
+
+def is_minified_css(path):
+    return minify.enabled and path.endswith(".css")
+
+
+def write_minified_css(source_path, destination_path):
+    with open(source_path) as f:
+        css = f.read()
+    minified = minify.minify_css(css)
+    minify.stats.record(len(css.encode()), len(minified.encode()))
+    return output_writer.write_if_changed(destination_path, minified)
+
+
+def sync_dir(source, destination, previous=(), compare_hash=False, link=False):
+    synced = _sync_tree(source, destination, compare_hash, link)
+    for path in sorted(set(previous) - set(synced)):
+        if os.path.isfile(path):
+            print(f"Deleting {path}")
+            os.remove(path)
+    return synced
+
+
+def _sync_tree(source, destination, compare_hash, link):
+    os.makedirs(destination, exist_ok=True)
+    synced = []
+    for item in sorted(os.listdir(source)):
+        source_path = os.path.join(source, item)
+        destination_path = os.path.join(destination, item)
+        if os.path.isfile(source_path):
+            if is_minified_css(source_path):
+                # Minified output never matches its source, so compare the
+                # minified text with the existing file instead.
+                if write_minified_css(source_path, destination_path):
+                    print(f"Minifying {source_path} -> {destination_path}")
+            elif not files_match(source_path, destination_path, compare_hash):
+                print(f"Copying {source_path} -> {destination_path}")
+                copy_file(source_path, destination_path, link)
+            synced.append(destination_path)
         elif os.path.isdir(source_path):
-            copy_dir(source_path, destination_path)
+            synced.extend(
+                _sync_tree(source_path, destination_path, compare_hash, link)
+            )
+    return synced
 
 
+@profiling.profiled("blocks")
 def extract_title(markdown):
-    lines = markdown.split("\n")
-    for line in lines:
-        if line.startswith("# "):
-            return line.strip("#").strip()
-    raise ValueError("No title line found")
+    fields, body = split_front_matter(markdown)
+    return extract_title_from_lines(body.split("\n"), fields)
+
+
+def extract_title_from_lines(lines, fields=None):
+    title = title_from_lines(fields or {}, lines)
+    if title is None:
+        raise ValueError("No title line found")
+    return title
+
+
+def body_first_line(markdown, body):
+    return markdown.count("\n", 0, len(markdown) - len(body)) + 1
+
 
+def page_values(fields, title, content):
+    return {**template_values(fields), "Title": title, "Content": content}
 
-def generate_page(from_path, template_path, dest_path):
+
+@contextlib.contextmanager
+def open_page_output(dest_path):
+    with output_writer.open_output(dest_path) as f, minify.minified_html(f) as out:
+        yield out
+
+
+def generate_page(from_path, template_path, dest_path, collect_references=False):
     print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+    if os.path.getsize(from_path) >= STREAM_THRESHOLD_BYTES:
+        return generate_page_streaming(
+            from_path, template_path, dest_path, collect_references
+        )
+    with profiling.page(from_path):
+        with profiling.stage("read"):
+            with open(from_path) as f:
+                markdown = f.read()
+            template = load_template(template_path)
+        references = PageReferences() if collect_references else None
+        fields, body = split_front_matter(markdown)
+        html_node = markdown_to_html_node(
+            body, references, body_first_line(markdown, body)
+        )
+        title = extract_title_from_lines(body.split("\n"), fields)
+        with profiling.stage("write"), open_page_output(dest_path) as f:
+            template.write(f, page_values(fields, title, html_node))
+    return references
+
+
+def generate_page_streaming(
+    from_path, template_path, dest_path, collect_references=False
+):
+    references = PageReferences() if collect_references else None
+    with profiling.page(from_path), open(from_path) as source:
+        template = load_template(template_path)
+        fields, header_lines = read_front_matter(source)
+        body_start = source.tell()
+        title = extract_title_from_lines(
+            (line.rstrip("\n") for line in source), fields
+        )
+        source.seek(body_start)
+        lines = (line.rstrip("\n") for line in source)
+        content = MarkdownHTMLStream(lines, references, header_lines + 1)
+        with open_page_output(dest_path) as f:
+            template.write(f, page_values(fields, title, content))
+    return references
+
+
+def render_page(from_path, template_path):
     with open(from_path) as f:
         markdown = f.read()
-    with open(template_path) as f:
-        template = f.read()
-    html_node = markdown_to_html_node(markdown)
-    content_html = html_node.to_html()
-    title = extract_title(markdown)
-    html_page = template.replace("{{ Content }}", content_html).replace(
-        "{{ Title }}", title
+    return render_markdown(markdown, template_path)
+
+
+def render_markdown(markdown, template_path, references=None):
+    template = load_template(template_path)
+    fields, body = split_front_matter(markdown)
+    html_node = markdown_to_html_node(
+        body, references, body_first_line(markdown, body)
     )
-    dest_dir = os.path.dirname(dest_path)
-    if not os.path.exists(dest_dir):
-        os.mkdir(dest_dir)
-    with open(dest_path, "w") as f:
-        f.write(html_page)
+    title = extract_title_from_lines(body.split("\n"), fields)
+    return template.render(page_values(fields, title, html_node))
 
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path):
+def is_unpublished_draft(from_path):
+    return not front_matter.include_drafts and front_matter.is_draft(from_path)
+
+
+def skip_draft(from_path, dest_path, manifest=None, graph=None):
+    print(f"Skipping draft page {from_path}")
+    if manifest is not None:
+        # Unseen pages are dropped from the manifest by remove_stale_pages.
+        manifest.seen_sources.discard(from_path)
+    if graph is not None:
+        graph.pages.pop(os.path.normpath(from_path), None)
+    if os.path.exists(dest_path):
+        print(f"Deleting {dest_path}")
+        os.remove(dest_path)
+
+
+def generate_pages_recursive(
+    dir_path_content, template_path, dest_dir_path, manifest=None, graph=None
+):
     for item in os.listdir(dir_path_content):
         path = os.path.join(dir_path_content, item)
         if os.path.isfile(path):
             name, _ = os.path.splitext(item)
             dest_path = os.path.join(dest_dir_path, f"{name}.html")
-            generate_page(path, template_path, dest_path)
+            if is_unchanged(path, template_path, dest_path, manifest, graph):
+                print(f"Skipping unchanged page {path}")
+                continue
+            if is_unpublished_draft(path):
+                skip_draft(path, dest_path, manifest, graph)
+                continue
+            references = generate_page(
+                path, template_path, dest_path, wants_references(manifest, graph)
+            )
+            if manifest is not None:
+                manifest.record(
+                    path, template_path, dest_path, page_assets(references)
+                )
+            if graph is not None:
+                graph.add_page(path, template_path, dest_path, references)
         elif os.path.isdir(path):
             dest_path = os.path.join(dest_dir_path, item)
-            generate_pages_recursive(path, template_path, dest_path)
+            generate_pages_recursive(path, template_path, dest_path, manifest, graph)
+
+
+def find_pages(dir_path_content, dest_dir_path):
+    pages = []
+    for item in sorted(os.listdir(dir_path_content)):
+        path = os.path.join(dir_path_content, item)
+        if os.path.isfile(path):
+            name, _ = os.path.splitext(item)
+            pages.append((path, os.path.join(dest_dir_path, f"{name}.html")))
+        elif os.path.isdir(path):
+            pages.extend(find_pages(path, os.path.join(dest_dir_path, item)))
+    return pages
+
+
+def page_dest_path(from_path, dir_path_content, dest_dir_path):
+    name, _ = os.path.splitext(os.path.relpath(from_path, dir_path_content))
+    return os.path.join(dest_dir_path, f"{name}.html")
+
+
+def build_options():
+    # Recorded with each page in the build manifest; a page built with
+    # different options is rendered again.
+    images = image_pipeline.active_pipeline
+    return {
+        "drafts": front_matter.include_drafts,
+        "minify": minify.enabled,
+        "image_widths": list(images.widths) if images is not None else None,
+    }
+
+
+def is_unchanged(from_path, template_path, dest_path, manifest=None, graph=None):
+    if manifest is None or not manifest.is_current(
+        from_path, template_path, dest_path
+    ):
+        return False
+    # A page the graph has no entry for, for example because the graph file
+    # was deleted, is rendered again to collect its links.
+    return graph is None or os.path.normpath(from_path) in graph.pages
+
+
+def wants_references(manifest, graph):
+    # The manifest only needs references for the images whose attributes
+    # the image pipeline writes into the page.
+    return graph is not None or (
+        manifest is not None and image_pipeline.active_pipeline is not None
+    )
+
+
+def page_assets(references):
+    images = image_pipeline.active_pipeline
+    if references is None or images is None:
+        return []
+    paths = (images.source_path(url) for url, _ in references.assets)
+    return sorted({path for path in paths if path is not None})
+
+
+def worker_config():
+    cache = block_cache.active_cache
+    images = image_pipeline.active_pipeline
+    return (
+        profiling.profiler.enabled,
+        (cache.maxsize, cache.path) if cache is not None else None,
+        (
+            (images.static_dir, images.cache_dir, images.widths, images.level)
+            if images is not None
+            else None
+        ),
+        minify.enabled,
+    )
+
+
+def init_worker(profile, cache_config, image_config, minify_html):
+    profiling.profiler.enabled = profile
+    minify.enabled = minify_html
+    # Forked workers inherit the parent's counters; start them from zero.
+    output_writer.stats.take_counts()
+    minify.stats.take_counts()
+    if cache_config is not None:
+        block_cache.configure(*cache_config)
+    if image_config is not None:
+        image_pipeline.configure(*image_config)
+
+
+def take_worker_counts():
+    snapshot = profiling.profiler.snapshot() if profiling.profiler.enabled else None
+    profiling.profiler.reset()
+    cache = block_cache.active_cache
+    cache_counts = cache.take_counts() if cache is not None else None
+    write_counts = output_writer.stats.take_counts()
+    minify_counts = minify.stats.take_counts()
+    return snapshot, cache_counts, write_counts, minify_counts
+
+
+def merge_worker_counts(counts):
+    snapshot, cache_counts, write_counts, minify_counts = counts
+    output_writer.stats.add_counts(write_counts)
+    minify.stats.add_counts(minify_counts)
+    if snapshot is not None:
+        profiling.profiler.merge(snapshot)
+    if cache_counts is not None:
+        block_cache.active_cache.add_counts(cache_counts)
+
+
+def _generate_page_captured(page):
+    from_path, template_path, dest_path, collect_references = page
+    profiling.profiler.reset()
+    log = io.StringIO()
+    error = None
+    references = None
+    try:
+        with contextlib.redirect_stdout(log):
+            references = generate_page(
+                from_path, template_path, dest_path, collect_references
+            )
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return log.getvalue(), error, take_worker_counts(), references
+
+
+def generate_pages_parallel(
+    dir_path_content,
+    template_path,
+    dest_dir_path,
+    workers=None,
+    chunksize=16,
+    manifest=None,
+    graph=None,
+):
+    pages = []
+    for from_path, dest_path in find_pages(dir_path_content, dest_dir_path):
+        if is_unchanged(from_path, template_path, dest_path, manifest, graph):
+            print(f"Skipping unchanged page {from_path}")
+            continue
+        if is_unpublished_draft(from_path):
+            skip_draft(from_path, dest_path, manifest, graph)
+            continue
+        pages.append(
+            (from_path, template_path, dest_path, wants_references(manifest, graph))
+        )
+
+    failures = []
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=init_worker,
+        initargs=worker_config(),
+    ) as executor:
+        results = executor.map(_generate_page_captured, pages, chunksize=chunksize)
+        for (from_path, _, dest_path, _), result in zip(pages, results):
+            log, error, counts, references = result
+            print(log, end="")
+            merge_worker_counts(counts)
+            if error is not None:
+                print(f"Failed to generate page from {from_path}: {error}")
+                failures.append(from_path)
+                continue
+            if manifest is not None:
+                manifest.record(
+                    from_path, template_path, dest_path, page_assets(references)
+                )
+            if graph is not None:
+                graph.add_page(from_path, template_path, dest_path, references)
+
+    if failures:
+        raise RuntimeError(f"{len(failures)} page(s) failed to generate")
@@ -1,4 +1,9 @@
+import profiling
+
+
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
@@ -8,6 +13,13 @@ class HTMLNode:
     def to_html(self):
         raise NotImplementedError
 
+    def iter_html(self):
+        raise NotImplementedError
+
+    @profiling.profiled("serialize")
+    def write_html(self, fp):
+        fp.writelines(self.iter_html())
+
     def props_to_html(self):
         return (
             "".join(f' {key}="{value}"' for key, value in self.props.items())
@@ -30,6 +42,8 @@ class HTMLNode:
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, value, tag=None, props=None):
         super().__init__(tag, value, props=props)
 
@@ -40,19 +54,27 @@ class LeafNode(HTMLNode):
             return self.value
         return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
 
+    def iter_html(self):
+        yield self.to_html()
+
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, children=children, props=props)
 
+    @profiling.profiled("serialize")
     def to_html(self):
+        return "".join(self.iter_html())
+
+    def iter_html(self):
         if self.tag is None:
             raise ValueError("A tag must be specified")
         if self.children is None:
             raise ValueError("Parent node must have children")
 
-        html_nodes = ""
+        yield f"<{self.tag}{self.props_to_html()}>"
         for child in self.children:
-            html_nodes += child.to_html()
-
-        return f"<{self.tag}{self.props_to_html()}>{html_nodes}</{self.tag}>"
+            yield from child.iter_html()
+        yield f"</{self.tag}>"
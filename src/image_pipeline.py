@@ -0,0 +1,393 @@
+import hashlib
+import math
+import os
+import shutil
+import struct
+import zlib
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
+from urllib.parse import unquote, urlsplit
+
+from build_manifest import hash_file
+from output_writer import write_atomic
+
+# Bump whenever derivative encoding changes so cached files are regenerated.
+IMAGE_VERSION = "1"
+DEFAULT_WIDTHS = (480, 960)
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+COLOR_TYPES = {1: 0, 2: 4, 3: 2, 4: 6}
+
+PNGHeader = namedtuple(
+    "PNGHeader", ["width", "height", "bit_depth", "color_type", "interlace"]
+)
+PNGImage = namedtuple("PNGImage", ["width", "height", "channels", "rows"])
+
+
+def read_png_header(path):
+    with open(path, "rb") as f:
+        data = f.read(33)
+    if data[:8] != PNG_SIGNATURE or data[12:16] != b"IHDR":
+        raise ValueError(f"Not a PNG file: {path}")
+    if len(data) < 29:
+        raise ValueError(f"Truncated PNG file: {path}")
+    width, height, bit_depth, color_type, _, _, interlace = struct.unpack(
+        ">IIBBBBB", data[16:29]
+    )
+    return PNGHeader(width, height, bit_depth, color_type, interlace)
+
+
+def is_supported(header):
+    return (
+        header.bit_depth == 8
+        and header.color_type in CHANNELS
+        and header.interlace == 0
+    )
+
+
+def _iter_chunks(data):
+    position = len(PNG_SIGNATURE)
+    while position < len(data):
+        (length,) = struct.unpack(">I", data[position : position + 4])
+        kind = data[position + 4 : position + 8]
+        yield kind, data[position + 8 : position + 8 + length]
+        position += length + 12
+
+
+def read_png(path):
+    header = read_png_header(path)
+    if not is_supported(header):
+        raise ValueError(f"Unsupported PNG format: {path}")
+    with open(path, "rb") as f:
+        data = f.read()
+    idat = []
+    palette = transparency = None
+    for kind, body in _iter_chunks(data):
+        if kind == b"IDAT":
+            idat.append(body)
+        elif kind == b"PLTE":
+            palette = body
+        elif kind == b"tRNS":
+            transparency = body
+        elif kind == b"IEND":
+            break
+    channels = CHANNELS[header.color_type]
+    rows = _unfilter(
+        zlib.decompress(b"".join(idat)),
+        header.height,
+        header.width * channels,
+        channels,
+    )
+    if header.color_type == 3:
+        rows, channels = _expand_palette(rows, palette, transparency)
+    return PNGImage(header.width, header.height, channels, rows)
+
+
+def _unfilter(raw, height, stride, bpp):
+    rows = []
+    previous = bytes(stride)
+    position = 0
+    for _ in range(height):
+        filter_type = raw[position]
+        line = raw[position + 1 : position + 1 + stride]
+        position += stride + 1
+        if filter_type == 0:
+            row = line
+        elif filter_type == 2:
+            row = bytes([(a + b) & 255 for a, b in zip(line, previous)])
+        else:
+            row = bytearray(line)
+            if filter_type == 1:
+                for i in range(bpp, stride):
+                    row[i] = (row[i] + row[i - bpp]) & 255
+            elif filter_type == 3:
+                for i in range(stride):
+                    left = row[i - bpp] if i >= bpp else 0
+                    row[i] = (row[i] + ((left + previous[i]) >> 1)) & 255
+            elif filter_type == 4:
+                for i in range(stride):
+                    up = previous[i]
+                    if i >= bpp:
+                        left = row[i - bpp]
+                        up_left = previous[i - bpp]
+                    else:
+                        left = up_left = 0
+                    estimate = left + up - up_left
+                    to_left = abs(estimate - left)
+                    to_up = abs(estimate - up)
+                    to_up_left = abs(estimate - up_left)
+                    if to_left <= to_up and to_left <= to_up_left:
+                        predictor = left
+                    elif to_up <= to_up_left:
+                        predictor = up
+                    else:
+                        predictor = up_left
+                    row[i] = (row[i] + predictor) & 255
+            else:
+                raise ValueError(f"Invalid PNG filter type {filter_type}")
+            row = bytes(row)
+        rows.append(row)
+        previous = row
+    return rows
+
+
+def _expand_palette(rows, palette, transparency):
+    if transparency:
+        alpha = transparency + b"\xff" * (256 - len(transparency))
+        colors = [
+            palette[i * 3 : i * 3 + 3] + alpha[i : i + 1]
+            for i in range(len(palette) // 3)
+        ]
+        channels = 4
+    else:
+        colors = [palette[i * 3 : i * 3 + 3] for i in range(len(palette) // 3)]
+        channels = 3
+    return [b"".join([colors[index] for index in row]) for row in rows], channels
+
+
+def _picker(indices):
+    if len(indices) == 1:
+        index = indices[0]
+        return lambda row: (row[index],)
+    return itemgetter(*indices)
+
+
+def resize(image, width):
+    if width >= image.width:
+        return image
+    height = max(1, round(image.height * width / image.width))
+    channels = image.channels
+    x_scale = image.width / width
+    y_scale = image.height / height
+    # Average a grid of samples per output pixel, enough to cover its box.
+    x_samples = math.ceil(x_scale)
+    y_samples = math.ceil(y_scale)
+    pickers = [
+        _picker(
+            [
+                min(int((x + (k + 0.5) / x_samples) * x_scale), image.width - 1)
+                * channels
+                + channel
+                for x in range(width)
+                for channel in range(channels)
+            ]
+        )
+        for k in range(x_samples)
+    ]
+    count = x_samples * y_samples
+    half = count // 2
+    rows = []
+    for y in range(height):
+        sources = [
+            image.rows[
+                min(int((y + (k + 0.5) / y_samples) * y_scale), image.height - 1)
+            ]
+            for k in range(y_samples)
+        ]
+        samples = [pick(row) for row in sources for pick in pickers]
+        rows.append(
+            bytes([(sum(values) + half) // count for values in zip(*samples)])
+        )
+    return PNGImage(width, height, channels, rows)
+
+
+def _chunk(kind, body):
+    return (
+        struct.pack(">I", len(body))
+        + kind
+        + body
+        + struct.pack(">I", zlib.crc32(kind + body))
+    )
+
+
+def encode_png(image, level=9):
+    color_type = COLOR_TYPES[image.channels]
+    header = struct.pack(">IIBBBBB", image.width, image.height, 8, color_type, 0, 0, 0)
+    compressor = zlib.compressobj(level)
+    compressed = []
+    bpp = image.channels
+    previous = bytes(image.width * bpp)
+    for row in image.rows:
+        # The Average filter predicts each byte from its left and upper
+        # neighbours, which suits photographs best of the single filters.
+        left = bytes(bpp) + row[:-bpp]
+        filtered = bytes(
+            [(x - ((a + b) >> 1)) & 255 for x, a, b in zip(row, left, previous)]
+        )
+        compressed.append(compressor.compress(b"\x03" + filtered))
+        previous = row
+    compressed.append(compressor.flush())
+    return (
+        PNG_SIGNATURE
+        + _chunk(b"IHDR", header)
+        + _chunk(b"IDAT", b"".join(compressed))
+        + _chunk(b"IEND", b"")
+    )
+
+
+def variant_widths(width, widths):
+    return sorted({w for w in widths if w < width} | {width})
+
+
+def variant_path(path, width):
+    root, ext = os.path.splitext(path)
+    return f"{root}-{width}w{ext}"
+
+
+def derivative_key(source_hash, width, level):
+    data = f"{IMAGE_VERSION}\0{source_hash}\0{width}\0{level}".encode()
+    return hashlib.sha256(data).hexdigest()
+
+
+def process_image(source_path, dest_path, cache_dir, widths, level):
+    source_hash = hash_file(source_path)
+    image = None
+    generated = reused = 0
+    for width in widths:
+        key = derivative_key(source_hash, width, level)
+        cache_path = os.path.join(cache_dir, key[:2], f"{key}.png")
+        if os.path.exists(cache_path):
+            reused += 1
+        else:
+            if image is None:
+                image = read_png(source_path)
+            data = encode_png(resize(image, width), level)
+            if width == image.width and len(data) >= os.path.getsize(source_path):
+                # Re-encoding did not help; ship the original bytes instead.
+                with open(source_path, "rb") as f:
+                    data = f.read()
+            write_atomic(cache_path, data)
+            generated += 1
+        output_path = variant_path(dest_path, width)
+        cache_stat = os.stat(cache_path)
+        try:
+            output_stat = os.stat(output_path)
+        except FileNotFoundError:
+            output_stat = None
+        if output_stat is None or (output_stat.st_size, output_stat.st_mtime_ns) != (
+            cache_stat.st_size,
+            cache_stat.st_mtime_ns,
+        ):
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            shutil.copy2(cache_path, output_path)
+    return generated, reused
+
+
+class ImagePipeline:
+    def __init__(self, static_dir, cache_dir, widths=DEFAULT_WIDTHS, level=9):
+        self.static_dir = static_dir
+        self.cache_dir = cache_dir
+        self.widths = tuple(widths)
+        self.level = level
+        self.generated = 0
+        self.reused = 0
+        self._headers = {}
+        self._executor = None
+        self._jobs = []
+
+    def source_path(self, url):
+        parts = urlsplit(url)
+        if parts.scheme or parts.netloc or not parts.path.startswith("/"):
+            return None
+        return os.path.join(self.static_dir, unquote(parts.path).lstrip("/"))
+
+    def header(self, path):
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        cached = self._headers.get(path)
+        if cached is None or cached[0] != mtime:
+            # Directories, unreadable and malformed files are not images.
+            try:
+                header = read_png_header(path)
+            except (OSError, ValueError):
+                header = None
+            cached = self._headers[path] = (mtime, header)
+        return cached[1]
+
+    def attributes(self, url):
+        attributes = {}
+        path = self.source_path(url)
+        header = self.header(path) if path is not None else None
+        if header is not None:
+            attributes["width"] = str(header.width)
+            attributes["height"] = str(header.height)
+            if is_supported(header):
+                url_path = urlsplit(url).path
+                attributes["srcset"] = ", ".join(
+                    f"{variant_path(url_path, width)} {width}w"
+                    for width in variant_widths(header.width, self.widths)
+                )
+        attributes["loading"] = "lazy"
+        return attributes
+
+    def find_images(self):
+        images = []
+        for dir_path, _, file_names in os.walk(self.static_dir):
+            for file_name in sorted(file_names):
+                path = os.path.join(dir_path, file_name)
+                if file_name.lower().endswith(".png"):
+                    header = self.header(path)
+                    if header is not None and is_supported(header):
+                        images.append((path, header))
+        return sorted(images)
+
+    def start(self, dest_dir, workers=None):
+        self._executor = ProcessPoolExecutor(workers)
+        for path, header in self.find_images():
+            dest_path = os.path.join(dest_dir, os.path.relpath(path, self.static_dir))
+            self._jobs.append(
+                (
+                    path,
+                    self._executor.submit(
+                        process_image,
+                        path,
+                        dest_path,
+                        self.cache_dir,
+                        variant_widths(header.width, self.widths),
+                        self.level,
+                    ),
+                )
+            )
+
+    def finish(self):
+        failures = []
+        try:
+            for path, job in self._jobs:
+                try:
+                    generated, reused = job.result()
+                except Exception as e:
+                    print(f"Failed to process image {path}: {type(e).__name__}: {e}")
+                    failures.append(path)
+                    continue
+                self.generated += generated
+                self.reused += reused
+        finally:
+            self._jobs = []
+            self._executor.shutdown()
+            self._executor = None
+        if failures:
+            raise RuntimeError(f"{len(failures)} image(s) failed to process")
+
+    def summary(self):
+        return (
+            f"Images: {self.generated} derivatives generated, "
+            f"{self.reused} reused from cache"
+        )
+
+
+active_pipeline = None
+
+
+def configure(static_dir, cache_dir, widths=DEFAULT_WIDTHS, level=9):
+    global active_pipeline
+    active_pipeline = ImagePipeline(static_dir, cache_dir, widths, level)
+    return active_pipeline
+
+
+def disable():
+    global active_pipeline
+    active_pipeline = None
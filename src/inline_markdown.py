@@ -1,5 +1,11 @@
 import re
-from textnode import TextNode, TextType
+
+import profiling
+from textnode import TextNode, TextType, text_to_html_node
+
+IMAGE_PATTERN = re.compile(r"!\[([^\]]*)\]\(([^\)]*)\)")
+LINK_PATTERN = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+ASTERISK_RUN_PATTERN = re.compile(r"\*+")
 
 
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
@@ -8,63 +14,46 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
 
     new_nodes = []
     for node in old_nodes:
-        if node.text_type is not TextType.TEXT or not is_valid_markdown(
-            node.text, delimiter
-        ):
+        if node.text_type is not TextType.TEXT:
             new_nodes.append(node)
-        else:
-            new_nodes.extend(split_node_text_delimiter(node.text, delimiter, text_type))
-
-    return new_nodes
-
-
-def split_node_text_delimiter(
-    text, delimiter, text_type, inside_delimiter_pair=False, text_nodes=None
-):
-    if text_nodes is None:
-        text_nodes = []
-
-    text_split = split_text(text, delimiter)
-
-    if text_split and text_split[0] != "":
-        text_nodes.append(
-            TextNode(
-                text_split[0], text_type if inside_delimiter_pair else TextType.TEXT
+            continue
+        for text, inside_delimiter_pair in split_delimited_text(node.text, delimiter):
+            new_nodes.append(
+                TextNode(text, text_type if inside_delimiter_pair else TextType.TEXT)
             )
-        )
 
-    if len(text_split) > 1 and text_split[1] != "":
-        return split_node_text_delimiter(
-            text_split[1], delimiter, text_type, not inside_delimiter_pair, text_nodes
-        )
-    else:
-        return text_nodes
+    return new_nodes
 
 
-def split_text(text, delimiter):
+def split_delimited_text(text, delimiter):
+    if not is_valid_markdown(text, delimiter):
+        return ((text, False),)
     if delimiter == "*":
-        if len(set(text)) == 1:
-            return [""]
-        substring_one = ""
-        break_position = 0
-        delimiter_count = 0
-        for i, character in enumerate(text):
-            if character == delimiter:
-                delimiter_count += 1
-                if (
-                    i == len(text) - 1 or text[i + 1] != delimiter
-                ) and delimiter_count < 2:
-                    break_position = i + 1
-                    break
-                if delimiter_count > 1:
-                    delimiter_count = 0
-            substring_one += character
-        else:
-            break_position = len(text)
-        substring_two = text[break_position:]
-        return [substring_one, substring_two]
-    else:
-        return text.split(delimiter, maxsplit=1)
+        return split_italic_text(text)
+    return (
+        (part, i % 2 == 1) for i, part in enumerate(text.split(delimiter)) if part
+    )
+
+
+def split_italic_text(text):
+    # Pairs of asterisks belong to bold markup, so only the last asterisk of an
+    # odd-length run delimits italics. A remainder made up of nothing but
+    # asterisks is dropped.
+    plain_end = len(text.rstrip("*"))
+    start = 0
+    inside_delimiter_pair = False
+    for run in ASTERISK_RUN_PATTERN.finditer(text):
+        if start >= plain_end:
+            return
+        if (run.end() - run.start()) % 2 == 0:
+            continue
+        delimiter_position = run.end() - 1
+        if delimiter_position > start:
+            yield text[start:delimiter_position], inside_delimiter_pair
+        start = delimiter_position + 1
+        inside_delimiter_pair = not inside_delimiter_pair
+    if start < plain_end:
+        yield text[start:], inside_delimiter_pair
 
 
 def is_valid_markdown(text, delimiter):
@@ -72,68 +61,79 @@ def is_valid_markdown(text, delimiter):
 
 
 def extract_markdown_images(text):
-    return re.findall(r"!\[([^\]]*)\]\(([^\)]*)\)", text)
+    return IMAGE_PATTERN.findall(text)
 
 
 def extract_markdown_links(text):
-    return re.findall(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    return LINK_PATTERN.findall(text)
 
 
-def split_nodes(old_nodes, markdown_extractor, text_type):
+def split_nodes(old_nodes, pattern, text_type):
     new_nodes = []
     for node in old_nodes:
-        if node.text_type != TextType.TEXT:
+        if node.text_type != TextType.TEXT or not node.text:
             new_nodes.append(node)
-            continue
-
-        node_text = node.text
-        items = markdown_extractor(node_text)
-
-        if not items:
-            new_nodes.append(node)
-            continue
-
-        for text, link in items:
-            item_markdown = get_link_or_image_markdown_format(text, link, text_type)
-            node_text_split = node_text.split(item_markdown, maxsplit=1)
-            if node_text_split and node_text_split[0] != "":
-                new_nodes.append(TextNode(node_text_split[0], TextType.TEXT))
-            if len(node_text_split) > 1:
-                node_text = node_text_split[1]
-            new_nodes.append(TextNode(text, text_type, link))
         else:
-            if node_text:
-                new_nodes.append(TextNode(node_text, TextType.TEXT))
-
+            new_nodes.extend(iter_pattern_nodes(node.text, pattern, text_type))
     return new_nodes
 
 
 def split_nodes_image(old_nodes):
-    return split_nodes(old_nodes, extract_markdown_images, TextType.IMAGE)
+    return split_nodes(old_nodes, IMAGE_PATTERN, TextType.IMAGE)
 
 
 def split_nodes_link(old_nodes):
-    return split_nodes(old_nodes, extract_markdown_links, TextType.LINK)
+    return split_nodes(old_nodes, LINK_PATTERN, TextType.LINK)
 
 
-def get_link_or_image_markdown_format(text, link, text_type):
-    match text_type:
-        case TextType.LINK:
-            return f"[{text}]({link})"
-        case TextType.IMAGE:
-            return f"![{text}]({link})"
-        case _:
-            raise ValueError("text_type must be one of LINK or IMAGE")
+def iter_pattern_nodes(text, pattern, text_type, make_node=TextNode, split_text=None):
+    start = 0
+    for match in pattern.finditer(text):
+        if match.start() > start:
+            yield from _text_nodes(text[start : match.start()], make_node, split_text)
+        yield make_node(match.group(1), text_type, match.group(2))
+        start = match.end()
+    if start < len(text):
+        yield from _text_nodes(text[start:], make_node, split_text)
 
 
+def _text_nodes(text, make_node, split_text):
+    if split_text is None:
+        return (make_node(text, TextType.TEXT),)
+    return split_text(text, make_node)
+
+
+@profiling.profiled("inline")
 def text_to_textnodes(text):
-    nodes = [TextNode(text, TextType.TEXT)]
-    for text_type, delimiter in [
-        (TextType.CODE, "`"),
-        (TextType.BOLD, "**"),
-        (TextType.ITALIC, "*"),
-    ]:
-        nodes = split_nodes_delimiter(nodes, delimiter, text_type)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
-    return nodes
+    return list(iter_inline_nodes(text, TextNode))
+
+
+@profiling.profiled("inline")
+def text_to_html_nodes(text, make_node=text_to_html_node):
+    return list(iter_inline_nodes(text, make_node))
+
+
+def iter_inline_nodes(text, make_node):
+    for code_text, is_code in split_delimited_text(text, "`"):
+        if is_code:
+            yield make_node(code_text, TextType.CODE)
+            continue
+        for bold_text, is_bold in split_delimited_text(code_text, "**"):
+            if is_bold:
+                yield make_node(bold_text, TextType.BOLD)
+                continue
+            for plain_text, is_italic in split_delimited_text(bold_text, "*"):
+                if is_italic:
+                    yield make_node(plain_text, TextType.ITALIC)
+                else:
+                    yield from iter_image_and_link_nodes(plain_text, make_node)
+
+
+def iter_image_and_link_nodes(text, make_node=TextNode):
+    return iter_pattern_nodes(
+        text, IMAGE_PATTERN, TextType.IMAGE, make_node, iter_link_nodes
+    )
+
+
+def iter_link_nodes(text, make_node=TextNode):
+    return iter_pattern_nodes(text, LINK_PATTERN, TextType.LINK, make_node)
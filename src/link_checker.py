@@ -0,0 +1,61 @@
+import argparse
+import os
+from collections import namedtuple
+
+from dependency_graph import GRAPH_PATH, DependencyGraph, output_candidates
+from generate_content import find_pages, is_unpublished_draft
+
+BrokenLink = namedtuple("BrokenLink", ["from_path", "line", "target"])
+
+
+def output_index(graph):
+    # Every published page in content/, whether or not it was rendered by
+    # this build, plus every file copied from static/.
+    paths = {entry["dest_path"] for entry in graph.pages.values()}
+    if os.path.isdir(graph.content_dir):
+        for from_path, dest_path in find_pages(graph.content_dir, graph.dest_dir):
+            if not is_unpublished_draft(from_path):
+                paths.add(os.path.normpath(dest_path))
+    for dir_path, _, file_names in os.walk(graph.static_dir):
+        for file_name in file_names:
+            paths.add(graph.dest_path_for(os.path.join(dir_path, file_name)))
+    return paths
+
+
+def find_broken_links(graph):
+    outputs = output_index(graph)
+    broken = []
+    for from_path, entry in sorted(graph.pages.items()):
+        for reference in entry["links"] + entry["assets"]:
+            if outputs.isdisjoint(output_candidates(reference["path"])):
+                broken.append(
+                    BrokenLink(from_path, reference["line"], reference["target"])
+                )
+    return broken
+
+
+def report_broken_links(broken):
+    for link in broken:
+        print(f"{link.from_path}:{link.line}: broken link to {link.target}")
+    print(f"Found {len(broken)} broken internal link(s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check internal links")
+    parser.add_argument("--graph", default=GRAPH_PATH)
+    parser.add_argument("--content", default="content")
+    parser.add_argument("--static", default="static")
+    parser.add_argument("--dest", default="public")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.graph):
+        parser.error(f"{args.graph} not found; build with --dependency-graph first")
+    graph = DependencyGraph.load(args.graph, args.content, args.static, args.dest)
+    broken = find_broken_links(graph)
+    report_broken_links(broken)
+    if broken:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
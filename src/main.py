@@ -1,13 +1,282 @@
-from generate_content import copy_dir, generate_pages_recursive
+import argparse
 
+import block_cache
+import compress
+import front_matter
+import image_pipeline
+import minify
+import output_writer
+import profiling
+from build_manifest import BuildManifest
+from dependency_graph import GRAPH_PATH, DependencyGraph
+from generate_content import (
+    build_options,
+    copy_dir,
+    find_pages,
+    generate_pages_parallel,
+    generate_pages_recursive,
+    sync_dir,
+)
+from link_checker import find_broken_links, report_broken_links
+from pipeline import generate_pages_async
 
-def main():
-    copy_dir("static", "public")
-    generate_pages_recursive(
-        "content",
-        "template.html",
-        "public",
+MANIFEST_PATH = ".build_manifest.json"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the static site")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only re-render pages whose source or template changed "
+        "(implies --sync-static)",
+    )
+    parser.add_argument(
+        "--manifest",
+        default=MANIFEST_PATH,
+        help="path of the build manifest used by --incremental and --sync-static",
+    )
+    parser.add_argument(
+        "--dependency-graph",
+        action="store_true",
+        help="record which pages link to other pages, templates and assets",
+    )
+    parser.add_argument(
+        "--check-links",
+        action="store_true",
+        help="fail the build if internal links or images point at missing files",
+    )
+    parser.add_argument(
+        "--graph",
+        default=GRAPH_PATH,
+        help="dependency graph written by --dependency-graph and --check-links",
+    )
+    parser.add_argument(
+        "--sync-static",
+        action="store_true",
+        help="only copy changed static files and remove ones deleted from static/",
+    )
+    parser.add_argument(
+        "--hash-static",
+        action="store_true",
+        help="with --sync-static, compare file contents instead of mtimes",
+    )
+    parser.add_argument(
+        "--link-static",
+        action="store_true",
+        help="with --sync-static, hardlink static files instead of copying",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="number of processes used to render pages (0 uses every core)",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=16,
+        help="pages dispatched to a worker process at a time",
+    )
+    parser.add_argument(
+        "--async-io",
+        action="store_true",
+        help="overlap reading sources, rendering and writing pages",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=64,
+        help="pages buffered between --async-io stages",
+    )
+    parser.add_argument(
+        "--block-cache",
+        action="store_true",
+        help="reuse rendered HTML for Markdown blocks seen before",
+    )
+    parser.add_argument(
+        "--block-cache-size",
+        type=int,
+        default=4096,
+        help="number of rendered blocks kept in memory",
+    )
+    parser.add_argument(
+        "--block-cache-dir",
+        help="also persist rendered blocks in this directory across builds",
+    )
+    parser.add_argument(
+        "--images",
+        action="store_true",
+        help="generate resized PNGs and add width, height and srcset to images",
+    )
+    parser.add_argument(
+        "--image-widths",
+        type=int,
+        nargs="+",
+        default=list(image_pipeline.DEFAULT_WIDTHS),
+        help="widths of the resized copies generated for each image",
     )
+    parser.add_argument(
+        "--image-compression",
+        type=int,
+        default=9,
+        choices=range(10),
+        help="zlib level used to re-encode images",
+    )
+    parser.add_argument(
+        "--image-cache-dir",
+        default=".image_cache",
+        help="where generated images are kept between builds",
+    )
+    parser.add_argument(
+        "--image-workers",
+        type=int,
+        default=0,
+        help="number of processes used for images (0 uses every core)",
+    )
+    parser.add_argument(
+        "--minify",
+        action="store_true",
+        help="strip redundant whitespace and comments from HTML and CSS outputs",
+    )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="write .gz (and .br when brotli is installed) copies of text outputs",
+    )
+    parser.add_argument(
+        "--drafts",
+        action="store_true",
+        help="also build pages whose front matter sets draft: true",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="print a per-stage and per-page timing summary after the build",
+    )
+    parser.add_argument(
+        "--profile-json",
+        help="write the timing profile as JSON to this path",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    profiling.profiler.enabled = args.profile or args.profile_json is not None
+    front_matter.include_drafts = args.drafts
+    minify.enabled = args.minify
+    if args.block_cache or args.block_cache_dir is not None:
+        block_cache.configure(args.block_cache_size, args.block_cache_dir)
+    if args.images:
+        image_pipeline.configure(
+            "static",
+            args.image_cache_dir,
+            args.image_widths,
+            args.image_compression,
+        )
+    manifest = (
+        BuildManifest.load(args.manifest)
+        if args.incremental or args.sync_static
+        else None
+    )
+    if manifest is not None:
+        manifest.options = build_options()
+    graph = (
+        DependencyGraph.load(args.graph, "content", "static", "public")
+        if args.dependency_graph or args.check_links
+        else None
+    )
+
+    with profiling.stage("assets"):
+        # Incremental builds sync static files too, so unchanged assets and
+        # pages keep their mtimes.
+        if manifest is not None:
+            manifest.assets = sync_dir(
+                "static",
+                "public",
+                manifest.assets,
+                compare_hash=args.hash_static,
+                link=args.link_static,
+            )
+        else:
+            copy_dir(
+                "static",
+                "public",
+                keep=[dest_path for _, dest_path in find_pages("content", "public")],
+            )
+
+    images = image_pipeline.active_pipeline
+    if images is not None:
+        # Images are processed in the background while pages render.
+        images.start("public", args.image_workers or None)
+
+    # Pages' front matter is read on first lookup, for example to skip a
+    # draft that needs rendering; pages skipped as unchanged are not read.
+    front_matter.active_index = front_matter.MetadataIndex(
+        find_pages("content", "public")
+    )
+    page_manifest = manifest if args.incremental else None
+    if args.async_io:
+        generate_pages_async(
+            "content",
+            "template.html",
+            "public",
+            workers=args.workers,
+            queue_size=args.queue_size,
+            manifest=page_manifest,
+            graph=graph,
+        )
+    elif args.workers == 1:
+        generate_pages_recursive(
+            "content",
+            "template.html",
+            "public",
+            page_manifest,
+            graph,
+        )
+    else:
+        generate_pages_parallel(
+            "content",
+            "template.html",
+            "public",
+            workers=args.workers or None,
+            chunksize=args.chunksize,
+            manifest=page_manifest,
+            graph=graph,
+        )
+
+    if images is not None:
+        images.finish()
+    if page_manifest is not None:
+        page_manifest.remove_stale_pages()
+    if args.compress:
+        with profiling.stage("compress"):
+            compress.compress_outputs("public")
+    if manifest is not None:
+        manifest.save(args.manifest)
+    if graph is not None:
+        graph.prune()
+        graph.save(args.graph)
+
+    print(output_writer.stats.summary())
+    if minify.enabled:
+        print(minify.stats.summary())
+    if args.compress:
+        print(compress.stats.summary())
+    if block_cache.active_cache is not None:
+        print(block_cache.active_cache.summary())
+    if images is not None:
+        print(images.summary())
+    if args.profile:
+        print(profiling.profiler.summary())
+    if args.profile_json is not None:
+        profiling.profiler.write_json(args.profile_json)
+    if args.check_links:
+        broken_links = find_broken_links(graph)
+        report_broken_links(broken_links)
+        if broken_links:
+            raise SystemExit(1)
 
 
 if __name__ == "__main__":
@@ -1,54 +1,175 @@
-import re
-
+import block_cache
+import image_pipeline
+import profiling
 from htmlnode import ParentNode, LeafNode
-from inline_markdown import text_to_textnodes
-from textnode import text_node_to_html_node
+from inline_markdown import text_to_html_nodes
+from textnode import text_to_html_node
+
+
+HEADING_PREFIXES = tuple("#" * x + " " for x in range(1, 7))
 
 
 def markdown_to_blocks(markdown):
-    blocks = markdown.split("\n\n")
-    return [block.strip() for block in blocks if block.strip() != ""]
+    return ["\n".join(lines) for lines in iter_block_lines(markdown.split("\n"))]
+
+
+def iter_block_lines(lines):
+    return (block for _, block in iter_numbered_blocks(lines))
+
+
+def iter_numbered_blocks(lines, first_line=1):
+    # Blocks are separated by empty lines, except inside a fenced code block
+    # that has been opened but not yet closed, and a closing fence ends its
+    # block. Each block comes with the number of its first line.
+    block = []
+    block_line = first_line
+    fence_open = False
+    for number, line in enumerate(lines, first_line):
+        if line == "" and not fence_open:
+            yield from _finish_block(block, block_line, fence_open)
+            block = []
+        elif not block:
+            if not line.strip():
+                continue
+            line = line.lstrip()
+            closing = line.rstrip()
+            fence_open = line.startswith("```") and not (
+                len(closing) >= 6 and closing.endswith("```")
+            )
+            block.append(line)
+            block_line = number
+        else:
+            block.append(line)
+            if fence_open and line.rstrip().endswith("```"):
+                # The closing fence ends the block even without an empty line.
+                yield from _finish_block(block, block_line, False)
+                block = []
+                fence_open = False
+    yield from _finish_block(block, block_line, fence_open)
+
+
+def _finish_block(block, block_line, fence_open):
+    if fence_open:
+        # An unterminated fence falls back to splitting on empty lines.
+        start = 0
+        for i, line in enumerate(block + [""]):
+            if line == "":
+                yield from _finish_block(block[start:i], block_line + start, False)
+                start = i + 1
+        return
+    skipped, block = _strip_block_lines(block)
+    if block:
+        yield block_line + skipped, block
+
+
+def _strip_block_lines(lines):
+    start = 0
+    end = len(lines)
+    while start < end and not lines[start].strip():
+        start += 1
+    while end > start and not lines[end - 1].strip():
+        end -= 1
+    if start == end:
+        return start, []
+    lines = lines[start:end]
+    lines[0] = lines[0].lstrip()
+    lines[-1] = lines[-1].rstrip()
+    return start, lines
 
 
 def block_to_block_type(block):
-    lines = block.split("\n")
-    if block.startswith(tuple("#" * x + " " for x in range(1, 7))):
+    return block_lines_to_block_type(block.split("\n"))
+
+
+def block_lines_to_block_type(lines):
+    if lines[0].startswith(HEADING_PREFIXES):
         return "heading"
-    elif block.startswith("```") and block.endswith("```"):
+    if lines[0].startswith("```") and lines[-1].endswith("```"):
         return "code"
-    elif all(x.startswith(">") for x in lines):
+    quote = star_list = dash_list = ordered_list = True
+    for number, line in enumerate(lines, 1):
+        quote = quote and line.startswith(">")
+        star_list = star_list and line.startswith("* ")
+        dash_list = dash_list and line.startswith("- ")
+        # Only single-digit item numbers count as an ordered list.
+        ordered_list = (
+            ordered_list and number < 10 and line.startswith(f"{number}. ")
+        )
+        if not (quote or star_list or dash_list or ordered_list):
+            return "paragraph"
+    if quote:
         return "quote"
-    elif all(x.startswith("* ") for x in lines):
+    if star_list or dash_list:
         return "unordered_list"
-    elif all(x.startswith("- ") for x in lines):
-        return "unordered_list"
-    elif all(re.match(r"^\d\. ", x) for x in lines):
-        for i, line in enumerate(lines):
-            if not line.startswith(f"{i + 1}. "):
-                break
+    return "ordered_list"
+
+
+@profiling.profiled("blocks")
+def markdown_to_html_node(markdown, references=None, first_line=1):
+    return ParentNode(
+        "div",
+        list(iter_block_nodes(markdown.split("\n"), references, first_line)),
+    )
+
+
+class MarkdownHTMLStream:
+    def __init__(self, lines, references=None, first_line=1):
+        self.lines = lines
+        self.references = references
+        self.first_line = first_line
+
+    def write_html(self, fp):
+        fp.write("<div>")
+        for node in iter_block_nodes(self.lines, self.references, self.first_line):
+            node.write_html(fp)
+        fp.write("</div>")
+
+
+def iter_block_nodes(lines, references=None, first_line=1):
+    # Links and images are recorded by the inline tokenizer as blocks render,
+    # tagged with the line each block starts on.
+    cache = block_cache.active_cache
+    make_node = node_factory(references)
+    for number, block in iter_numbered_blocks(lines, first_line):
+        if references is not None:
+            references.line = number
+        if cache is None:
+            yield block_lines_to_html_node(block, make_node)
         else:
-            return "ordered_list"
-    return "paragraph"
-
-
-def markdown_to_html_node(markdown):
-    children_nodes = []
-    blocks = markdown_to_blocks(markdown)
-    for block in blocks:
-        block_type = block_to_block_type(block)
-        if block_type == "heading":
-            children_nodes.append(make_heading_html_node(block))
-        elif block_type == "code":
-            code_node = LeafNode(block.strip("```").strip(), "code")
-            children_nodes.append(ParentNode("pre", [code_node]))
-        elif block_type == "quote":
-            children_nodes.append(make_quote_html_node(block))
-        elif block_type in ("unordered_list", "ordered_list"):
-            children_nodes.append(make_list_html_node(block, block_type))
-        elif block_type == "paragraph":
-            children_nodes.append(make_paragraph_html_node(block))
-
-    return ParentNode("div", children_nodes)
+            yield LeafNode(render_cached_block(cache, block, references))
+
+
+def render_cached_block(cache, lines, references=None):
+    # Image attributes come from the image files, which the block text does
+    # not capture, so blocks with images are always rendered afresh. So are
+    # blocks with links while references are collected, as a cached block
+    # never reaches the inline tokenizer.
+    fresh = image_pipeline.active_pipeline is not None and any(
+        "![" in line for line in lines
+    )
+    if references is not None:
+        fresh = fresh or any("](" in line for line in lines)
+    if fresh:
+        return block_lines_to_html_node(lines, node_factory(references)).to_html()
+    return cache.render(lines, block_lines_to_html_node)
+
+
+def node_factory(references):
+    return text_to_html_node if references is None else references.make_node
+
+
+def block_lines_to_html_node(lines, make_node=text_to_html_node):
+    block_type = block_lines_to_block_type(lines)
+    if block_type == "heading":
+        return make_heading_html_node("\n".join(lines))
+    elif block_type == "code":
+        code_node = LeafNode("\n".join(lines).strip("```").strip(), "code")
+        return ParentNode("pre", [code_node])
+    elif block_type == "quote":
+        return make_quote_html_node(lines, make_node)
+    elif block_type in ("unordered_list", "ordered_list"):
+        return make_list_html_node(lines, block_type, make_node)
+    return make_paragraph_html_node(lines, make_node)
 
 
 def make_heading_html_node(block):
@@ -57,19 +178,16 @@ def make_heading_html_node(block):
     return LeafNode(block_no_markdown.strip(), heading_tag)
 
 
-def make_paragraph_html_node(block):
-    paragraph = " ".join(block.split("\n"))
-    return ParentNode("p", text_to_children(paragraph))
+def make_paragraph_html_node(lines, make_node=text_to_html_node):
+    return ParentNode("p", text_to_children(" ".join(lines), make_node))
 
 
-def make_quote_html_node(block):
-    return ParentNode(
-        "blockquote",
-        text_to_children(block.lstrip(">").replace("\n>", "").strip()),
-    )
+def make_quote_html_node(lines, make_node=text_to_html_node):
+    quote = "".join([lines[0].lstrip(">")] + [line[1:] for line in lines[1:]])
+    return ParentNode("blockquote", text_to_children(quote.strip(), make_node))
 
 
-def make_list_html_node(block, list_type):
+def make_list_html_node(lines, list_type, make_node=text_to_html_node):
     if list_type == "unordered_list":
         list_marker_stripper = strip_unordered_list_marker
         list_tag = "ul"
@@ -79,11 +197,10 @@ def make_list_html_node(block, list_type):
     else:
         raise ValueError("List type must be one of 'unordered' or 'ordered'")
 
-    lines = block.split("\n")
     stripped_lines = list_marker_stripper(lines)
     list_nodes = []
     for line in stripped_lines:
-        list_item_children = text_to_children(line)
+        list_item_children = text_to_children(line, make_node)
         list_nodes.append(ParentNode("li", list_item_children))
     return ParentNode(list_tag, list_nodes)
 
@@ -103,6 +220,5 @@ def strip_unordered_list_marker(lines):
     return (text.lstrip(list_marker) for text in lines)
 
 
-def text_to_children(text):
-    text_nodes = text_to_textnodes(text)
-    return [text_node_to_html_node(text_node) for text_node in text_nodes]
+def text_to_children(text, make_node=text_to_html_node):
+    return text_to_html_nodes(text, make_node)
@@ -0,0 +1,195 @@
+import contextlib
+import io
+import re
+
+# Whitespace next to these tags never renders, so it can be dropped instead
+# of collapsed to a single space.
+BLOCK_TAGS = frozenset(
+    """
+    !doctype address article aside blockquote body dd details div dl dt
+    fieldset figcaption figure footer form h1 h2 h3 h4 h5 h6 head header hr
+    html li link main meta nav ol p section summary table tbody td tfoot th
+    thead title tr ul
+    """.split()
+)
+# Text inside these tags is written exactly as generated.
+PRESERVE_TAGS = frozenset(["pre", "code", "textarea"])
+RAW_TEXT_TAGS = frozenset(["script", "style", "textarea"])
+
+TAG_NAME_PATTERN = re.compile(r"<(/?)([!\w][\w-]*)")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+CSS_TOKEN_PATTERN = re.compile(
+    r"""(/\*.*?\*/)|("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|([^/"']+|/)""", re.S
+)
+CSS_SPACE_PATTERN = re.compile(r"\s*([{};,>])\s*|(:)\s+")
+
+
+class MinifyStats:
+    def __init__(self):
+        self.files = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def record(self, bytes_in, bytes_out):
+        self.files += 1
+        self.bytes_in += bytes_in
+        self.bytes_out += bytes_out
+
+    def take_counts(self):
+        counts = (self.files, self.bytes_in, self.bytes_out)
+        self.files = self.bytes_in = self.bytes_out = 0
+        return counts
+
+    def add_counts(self, counts):
+        files, bytes_in, bytes_out = counts
+        self.files += files
+        self.bytes_in += bytes_in
+        self.bytes_out += bytes_out
+
+    def summary(self):
+        saved = self.bytes_in - self.bytes_out
+        share = saved / self.bytes_in if self.bytes_in else 0.0
+        return f"Minified {self.files} files, saved {saved} bytes ({share:.1%})"
+
+
+enabled = False
+stats = MinifyStats()
+
+
+class HTMLMinifier:
+    def __init__(self, fp):
+        self.fp = fp
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._buffer = ""
+        self._previous_tag = None
+        self._preserve_depth = 0
+        self._raw_text_end = None
+        self._space_written = False
+
+    def write(self, text):
+        self.bytes_in += len(text.encode())
+        self._buffer += text
+        self._process()
+
+    def writelines(self, chunks):
+        for chunk in chunks:
+            self.write(chunk)
+
+    def close(self):
+        self._process(final=True)
+        stats.record(self.bytes_in, self.bytes_out)
+
+    def _emit(self, text):
+        if text:
+            self.bytes_out += len(text.encode())
+            self.fp.write(text)
+            self._space_written = text[-1].isspace()
+
+    def _process(self, final=False):
+        buffer = self._buffer
+        position = 0
+        while position < len(buffer):
+            if self._raw_text_end is not None:
+                end = buffer.lower().find(self._raw_text_end, position)
+                if end < 0:
+                    # Keep enough of the tail to recognise a split end tag.
+                    flush_to = len(buffer)
+                    if not final:
+                        keep = len(self._raw_text_end) - 1
+                        flush_to = max(position, flush_to - keep)
+                    self._emit(buffer[position:flush_to])
+                    position = flush_to
+                    break
+                self._emit(buffer[position:end])
+                self._raw_text_end = None
+                position = end
+                continue
+            start = buffer.find("<", position)
+            if start < 0:
+                if not final:
+                    break
+                self._text(buffer[position:], None, at_end=True)
+                position = len(buffer)
+                break
+            if buffer.startswith("<!--", start):
+                end = buffer.find("-->", start)
+                end = end + 3 if end >= 0 else -1
+            else:
+                end = buffer.find(">", start)
+                end = end + 1 if end >= 0 else -1
+            if end < 0:
+                if final:
+                    self._text(buffer[position:start], None)
+                    self._emit(buffer[start:])
+                    position = len(buffer)
+                break
+            tag = buffer[start:end]
+            match = TAG_NAME_PATTERN.match(tag)
+            name = match.group(2).lower() if match else None
+            self._text(buffer[position:start], name)
+            if tag.startswith("<!--"):
+                if self._preserve_depth:
+                    self._emit(tag)
+            else:
+                self._tag(tag, match, name)
+            position = end
+        self._buffer = buffer[position:]
+
+    def _text(self, text, next_tag, at_end=False):
+        if not text:
+            return
+        if self._preserve_depth:
+            self._emit(text)
+            return
+        text = WHITESPACE_PATTERN.sub(" ", text)
+        if self._previous_tag in BLOCK_TAGS or self._space_written:
+            text = text.lstrip(" ")
+        # A "<" that does not start a tag name, as in "a < b", is not a
+        # boundary, so the space before it is kept.
+        if next_tag in BLOCK_TAGS or at_end:
+            text = text.rstrip(" ")
+        self._emit(text)
+
+    def _tag(self, tag, match, name):
+        self._emit(tag)
+        self._previous_tag = name
+        if name is None:
+            return
+        closing = match.group(1) == "/"
+        if name in PRESERVE_TAGS:
+            if closing:
+                self._preserve_depth = max(0, self._preserve_depth - 1)
+            elif not tag.endswith("/>"):
+                self._preserve_depth += 1
+        if name in RAW_TEXT_TAGS and not closing:
+            self._raw_text_end = f"</{name}"
+
+
+@contextlib.contextmanager
+def minified_html(fp):
+    if not enabled:
+        yield fp
+        return
+    minifier = HTMLMinifier(fp)
+    yield minifier
+    minifier.close()
+
+
+def minify_html(html):
+    output = io.StringIO()
+    minifier = HTMLMinifier(output)
+    minifier.write(html)
+    minifier.close()
+    return output.getvalue()
+
+
+def minify_css(css):
+    parts = []
+    for comment, string, code in CSS_TOKEN_PATTERN.findall(css):
+        if string:
+            parts.append(string)
+        elif code:
+            code = WHITESPACE_PATTERN.sub(" ", code)
+            parts.append(CSS_SPACE_PATTERN.sub(r"\1\2", code).replace(";}", "}"))
+    return "".join(parts).strip()
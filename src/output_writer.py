@@ -0,0 +1,92 @@
+import contextlib
+import filecmp
+import os
+import tempfile
+
+# mkstemp creates files readable only by their owner; give replaced outputs
+# the permissions a plain open() would have.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+OUTPUT_MODE = 0o666 & ~_UMASK
+
+
+class WriteStats:
+    def __init__(self):
+        self.written = 0
+        self.skipped = 0
+
+    def take_counts(self):
+        counts = (self.written, self.skipped)
+        self.written = self.skipped = 0
+        return counts
+
+    def add_counts(self, counts):
+        written, skipped = counts
+        self.written += written
+        self.skipped += skipped
+
+    def summary(self):
+        return f"Wrote {self.written} files, skipped {self.skipped} unchanged files"
+
+
+stats = WriteStats()
+
+
+def _temp_file(dest_path):
+    dest_dir = os.path.dirname(dest_path)
+    if dest_dir:
+        os.makedirs(dest_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=dest_dir or ".", prefix=f".{os.path.basename(dest_path)}.", suffix=".tmp"
+    )
+    os.chmod(tmp_path, OUTPUT_MODE)
+    return fd, tmp_path
+
+
+def _replace_if_changed(tmp_path, dest_path):
+    if os.path.isfile(dest_path) and filecmp.cmp(tmp_path, dest_path, shallow=False):
+        os.remove(tmp_path)
+        stats.skipped += 1
+    else:
+        os.replace(tmp_path, dest_path)
+        stats.written += 1
+
+
+@contextlib.contextmanager
+def open_output(dest_path):
+    fd, tmp_path = _temp_file(dest_path)
+    try:
+        with os.fdopen(fd, "w") as f:
+            yield f
+        _replace_if_changed(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_if_changed(dest_path, text):
+    data = text.encode()
+    try:
+        if os.path.getsize(dest_path) == len(data):
+            with open(dest_path, "rb") as f:
+                if f.read() == data:
+                    stats.skipped += 1
+                    return False
+    except FileNotFoundError:
+        pass
+    write_atomic(dest_path, data)
+    stats.written += 1
+    return True
+
+
+def write_atomic(dest_path, data):
+    fd, tmp_path = _temp_file(dest_path)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
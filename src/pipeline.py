@@ -0,0 +1,167 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import minify
+import profiling
+from dependency_graph import PageReferences
+from generate_content import (
+    find_pages,
+    init_worker,
+    is_unchanged,
+    is_unpublished_draft,
+    merge_worker_counts,
+    page_assets,
+    render_markdown,
+    skip_draft,
+    take_worker_counts,
+    wants_references,
+    worker_config,
+)
+from output_writer import write_if_changed
+
+
+def read_text(path):
+    with open(path) as f:
+        return f.read()
+
+
+def render_source(from_path, markdown, template_path, collect_references=False):
+    references = PageReferences() if collect_references else None
+    with profiling.page(from_path):
+        html = render_markdown(markdown, template_path, references)
+    return html, references
+
+
+def _render_source_captured(from_path, markdown, template_path, collect_references):
+    # Runs in a worker process, whose counters are sent back with the page.
+    profiling.profiler.reset()
+    html = references = error = None
+    try:
+        html, references = render_source(
+            from_path, markdown, template_path, collect_references
+        )
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return html, references, error, take_worker_counts()
+
+
+def write_page(dest_path, html):
+    if minify.enabled:
+        html = minify.minify_html(html)
+    return write_if_changed(dest_path, html)
+
+
+async def _run_pipeline(
+    pages, template_path, executor, renderers, queue_size, manifest=None, graph=None
+):
+    loop = asyncio.get_running_loop()
+    read_queue = asyncio.Queue(queue_size)
+    write_queue = asyncio.Queue(queue_size)
+    failures = []
+
+    async def read_sources():
+        for from_path, dest_path in pages:
+            try:
+                markdown = await asyncio.to_thread(read_text, from_path)
+            except OSError as e:
+                failures.append((from_path, f"{type(e).__name__}: {e}"))
+                continue
+            await read_queue.put((from_path, dest_path, markdown))
+        for _ in range(renderers):
+            await read_queue.put(None)
+
+    async def render_pages():
+        while (item := await read_queue.get()) is not None:
+            from_path, dest_path, markdown = item
+            print(
+                f"Generating page from {from_path} to {dest_path} "
+                f"using {template_path}"
+            )
+            collect_references = wants_references(manifest, graph)
+            page = (from_path, markdown, template_path, collect_references)
+            if executor is None:
+                try:
+                    html, references = await loop.run_in_executor(
+                        None, render_source, *page
+                    )
+                except Exception as e:
+                    failures.append((from_path, f"{type(e).__name__}: {e}"))
+                    continue
+            else:
+                html, references, error, counts = await loop.run_in_executor(
+                    executor, _render_source_captured, *page
+                )
+                merge_worker_counts(counts)
+                if error is not None:
+                    failures.append((from_path, error))
+                    continue
+            await write_queue.put((from_path, dest_path, html, references))
+
+    async def write_pages():
+        while (item := await write_queue.get()) is not None:
+            from_path, dest_path, html, references = item
+            try:
+                await asyncio.to_thread(write_page, dest_path, html)
+            except OSError as e:
+                failures.append((from_path, f"{type(e).__name__}: {e}"))
+            else:
+                if manifest is not None:
+                    manifest.record(
+                        from_path, template_path, dest_path, page_assets(references)
+                    )
+                if graph is not None:
+                    graph.add_page(from_path, template_path, dest_path, references)
+
+    writer = asyncio.create_task(write_pages())
+    await asyncio.gather(read_sources(), *(render_pages() for _ in range(renderers)))
+    await write_queue.put(None)
+    await writer
+    return failures
+
+
+def generate_pages_async(
+    dir_path_content,
+    template_path,
+    dest_dir_path,
+    workers=1,
+    queue_size=64,
+    manifest=None,
+    graph=None,
+):
+    pages = []
+    for from_path, dest_path in find_pages(dir_path_content, dest_dir_path):
+        if is_unchanged(from_path, template_path, dest_path, manifest, graph):
+            print(f"Skipping unchanged page {from_path}")
+            continue
+        if is_unpublished_draft(from_path):
+            skip_draft(from_path, dest_path, manifest, graph)
+            continue
+        pages.append((from_path, dest_path))
+
+    # With a single worker pages render on a thread next to the I/O threads;
+    # otherwise rendering moves to a process pool to use more cores.
+    renderers = workers or os.cpu_count()
+    executor = (
+        ProcessPoolExecutor(
+            renderers, initializer=init_worker, initargs=worker_config()
+        )
+        if renderers > 1
+        else None
+    )
+    try:
+        failures = asyncio.run(
+            _run_pipeline(
+                pages, template_path, executor, renderers, queue_size, manifest, graph
+            )
+        )
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    failed = set()
+    for from_path, error in failures:
+        print(f"Failed to generate page from {from_path}: {error}")
+        failed.add(from_path)
+    if failed:
+        raise RuntimeError(f"{len(failed)} page(s) failed to generate")
@@ -0,0 +1,141 @@
+import argparse
+import mimetypes
+import os
+import posixpath
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock
+from urllib.parse import unquote, urlsplit
+
+from generate_content import render_page
+
+
+class RenderCache:
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, version, value):
+        with self._lock:
+            self.entries[key] = (version, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+
+class PreviewSite:
+    def __init__(self, content_dir, static_dir, template_path, cache_size=1024):
+        self.content_dir = content_dir
+        self.static_dir = static_dir
+        self.template_path = template_path
+        self.cache = RenderCache(cache_size)
+
+    def source_for(self, url_path):
+        path = posixpath.normpath(unquote(urlsplit(url_path).path)).lstrip("/")
+        if path.startswith(".."):
+            return None, None
+        if path in ("", "."):
+            path = "index.html"
+        name, ext = posixpath.splitext(path)
+        if ext in ("", ".html"):
+            candidates = [f"{name}.md", posixpath.join(name, "index.md")]
+            if not ext:
+                # Like the static server, /majesty prefers majesty/index.html
+                # and falls back to majesty.html.
+                candidates.reverse()
+            for candidate in candidates:
+                from_path = os.path.join(self.content_dir, *candidate.split("/"))
+                if os.path.isfile(from_path):
+                    return "page", from_path
+        static_path = os.path.join(self.static_dir, *path.split("/"))
+        if os.path.isfile(static_path):
+            return "static", static_path
+        return None, None
+
+    def render(self, from_path):
+        version = (
+            os.stat(from_path).st_mtime_ns,
+            os.stat(self.template_path).st_mtime_ns,
+        )
+        html = self.cache.get(from_path, version)
+        if html is None:
+            html = render_page(from_path, self.template_path).encode()
+            self.cache.put(from_path, version, html)
+        return html
+
+
+class PreviewRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.respond(send_body=True)
+
+    def do_HEAD(self):
+        self.respond(send_body=False)
+
+    def respond(self, send_body):
+        site = self.server.site
+        kind, path = site.source_for(self.path)
+        if kind is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        try:
+            if kind == "page":
+                body = site.render(path)
+                content_type = "text/html; charset=utf-8"
+            else:
+                with open(path, "rb") as f:
+                    body = f.read()
+                content_type = mimetypes.guess_type(path)[0]
+                content_type = content_type or "application/octet-stream"
+        except Exception as e:
+            self.send_error(HTTPStatus.INTERNAL_SERVER_ERROR, str(e))
+            return
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+
+def create_server(site, host="", port=8888):
+    server = ThreadingHTTPServer((host, port), PreviewRequestHandler)
+    server.site = site
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Preview the site without building")
+    parser.add_argument("--content", default="content")
+    parser.add_argument("--static", default="static")
+    parser.add_argument("--template", default="template.html")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--cache-size", type=int, default=1024)
+    args = parser.parse_args(argv)
+
+    site = PreviewSite(args.content, args.static, args.template, args.cache_size)
+    server = create_server(site, port=args.port)
+    print(f"Previewing {args.content} on http://localhost:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import contextlib
+import functools
+import json
+import time
+
+
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self.reset()
+
+    def reset(self):
+        self.stages = {}
+        self.pages = {}
+        self._stack = []
+
+    def start(self):
+        self._stack.append([time.perf_counter(), 0.0])
+
+    def stop(self, name):
+        start, child_seconds = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        if self._stack:
+            self._stack[-1][1] += elapsed
+        seconds, calls = self.stages.get(name, (0.0, 0))
+        self.stages[name] = (seconds + elapsed - child_seconds, calls + 1)
+
+    def record_page(self, path, seconds):
+        self.pages[path] = self.pages.get(path, 0.0) + seconds
+
+    def snapshot(self):
+        return {
+            "stages": {
+                name: {"seconds": seconds, "calls": calls}
+                for name, (seconds, calls) in self.stages.items()
+            },
+            "pages": dict(self.pages),
+        }
+
+    def merge(self, snapshot):
+        for name, stats in snapshot["stages"].items():
+            seconds, calls = self.stages.get(name, (0.0, 0))
+            self.stages[name] = (seconds + stats["seconds"], calls + stats["calls"])
+        for path, seconds in snapshot["pages"].items():
+            self.record_page(path, seconds)
+
+    def summary(self, slowest=10):
+        total = sum(seconds for seconds, _ in self.stages.values())
+        lines = [
+            "Build profile",
+            f"  {'stage':<12} {'calls':>8} {'seconds':>10} share",
+        ]
+        for name, (seconds, calls) in sorted(
+            self.stages.items(), key=lambda item: item[1][0], reverse=True
+        ):
+            share = seconds / total if total else 0.0
+            lines.append(f"  {name:<12} {calls:>8} {seconds:>10.4f} {share:6.1%}")
+        if self.pages:
+            lines.append(f"Slowest pages (of {len(self.pages)})")
+            for path, seconds in sorted(
+                self.pages.items(), key=lambda item: item[1], reverse=True
+            )[:slowest]:
+                lines.append(f"  {seconds:.4f}s {path}")
+        return "\n".join(lines)
+
+    def write_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2, sort_keys=True)
+
+
+profiler = Profiler()
+
+
+def profiled(name):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            profiler.start()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.stop(name)
+
+        return wrapper
+
+    return decorator
+
+
+@contextlib.contextmanager
+def _timed_stage(name):
+    profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop(name)
+
+
+_disabled = contextlib.nullcontext()
+
+
+def stage(name):
+    return _timed_stage(name) if profiler.enabled else _disabled
+
+
+@contextlib.contextmanager
+def _timed_page(path):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler.record_page(path, time.perf_counter() - start)
+
+
+def page(path):
+    return _timed_page(path) if profiler.enabled else _disabled
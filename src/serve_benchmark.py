@@ -0,0 +1,136 @@
+import argparse
+import asyncio
+import contextlib
+import os
+import socket
+import subprocess
+import sys
+import time
+
+DEFAULT_URLS = ("/", "/index.css", "/majesty/", "/images/rivendell.png")
+SERVERS = {
+    "http.server": lambda directory, port: [
+        sys.executable,
+        "-m",
+        "http.server",
+        "--bind",
+        "127.0.0.1",
+        "--directory",
+        directory,
+        str(port),
+    ],
+    "static_server": lambda directory, port: [
+        sys.executable,
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "static_server.py"),
+        "--host",
+        "127.0.0.1",
+        "--dir",
+        directory,
+        "--port",
+        str(port),
+    ],
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with contextlib.suppress(OSError):
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return
+        time.sleep(0.05)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    version, status, _ = head.split(b" ", 2)
+    headers = {}
+    for line in head.decode("latin-1").split("\r\n")[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    await reader.readexactly(int(headers.get("content-length", 0)))
+    connection = headers.get("connection", "").lower()
+    if version == b"HTTP/1.0":
+        return int(status), connection == "keep-alive"
+    return int(status), connection != "close"
+
+
+async def client(port, urls, deadline, counts):
+    reader = writer = None
+    index = 0
+    while time.monotonic() < deadline:
+        if writer is None:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        url = urls[index % len(urls)]
+        index += 1
+        writer.write(
+            f"GET {url} HTTP/1.1\r\nHost: localhost\r\n"
+            "Accept-Encoding: gzip\r\n\r\n".encode()
+        )
+        status, keep_alive = await read_response(reader)
+        counts[status] = counts.get(status, 0) + 1
+        # http.server answers HTTP/1.0 style and closes after every response.
+        if not keep_alive:
+            writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def load(port, urls, concurrency, duration):
+    counts = {}
+    deadline = time.monotonic() + duration
+    await asyncio.gather(
+        *(client(port, urls, deadline, counts) for _ in range(concurrency))
+    )
+    return counts
+
+
+def run_server(name, directory, urls, concurrency, duration):
+    port = free_port()
+    process = subprocess.Popen(
+        SERVERS[name](directory, port),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_port(port)
+        counts = asyncio.run(load(port, urls, concurrency, duration))
+    finally:
+        process.terminate()
+        process.wait()
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Load test the static server against http.server"
+    )
+    parser.add_argument("--dir", default="public")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--servers", nargs="+", choices=SERVERS, default=SERVERS)
+    parser.add_argument("urls", nargs="*", default=DEFAULT_URLS)
+    args = parser.parse_args(argv)
+
+    for name in args.servers:
+        counts = run_server(
+            name, args.dir, args.urls, args.concurrency, args.duration
+        )
+        total = sum(counts.values())
+        statuses = ", ".join(f"{status}: {n}" for status, n in sorted(counts.items()))
+        print(
+            f"{name:<14} {total / args.duration:>9.0f} requests/s "
+            f"({total} requests; {statuses})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+import argparse
+import asyncio
+import contextlib
+import email.utils
+import mimetypes
+import os
+import posixpath
+import threading
+import time
+from collections import OrderedDict
+from http import HTTPStatus
+from urllib.parse import unquote, urlsplit
+
+from compress import COMPRESSIBLE_EXTENSIONS, SIDECAR_SUFFIXES, sidecar_is_current
+
+MAX_CACHED_FILE_BYTES = 64 * 1024
+MAX_CACHE_BYTES = 32 * 1024 * 1024
+MAX_HEADER_BYTES = 64 * 1024
+
+
+def resolve_path(root, url):
+    path = posixpath.normpath(unquote(urlsplit(url).path))
+    parts = [part for part in path.split("/") if part and part not in (".", "..")]
+    file_path = os.path.join(root, *parts)
+    if os.path.isdir(file_path):
+        file_path = os.path.join(file_path, "index.html")
+    elif not os.path.isfile(file_path) and parts:
+        # Clean URLs: /majesty may be served from majesty.html.
+        file_path += ".html"
+    return file_path if os.path.isfile(file_path) else None
+
+
+def parse_accept_encoding(header):
+    accepted = {}
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name] = quality
+    return accepted
+
+
+def choose_encoding(accept_encoding, path):
+    accepted = parse_accept_encoding(accept_encoding)
+    best = None
+    best_quality = 0.0
+    # Prefer brotli over gzip when the client weighs them equally.
+    for encoding in ("br", "gzip"):
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality and sidecar_is_current(
+            path, path + SIDECAR_SUFFIXES[encoding]
+        ):
+            best, best_quality = encoding, quality
+    return best
+
+
+def content_type_for(path):
+    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if content_type.startswith("text/"):
+        content_type += "; charset=utf-8"
+    return content_type
+
+
+class CachedFile:
+    __slots__ = ("body_path", "size", "mtime_ns", "etag", "data", "checked", "headers")
+
+    def __init__(self, path, body_path, encoding, stat, data, checked):
+        self.body_path = body_path
+        self.size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns
+        self.etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}{encoding or ""}"'
+        self.data = data
+        self.checked = checked
+        headers = {
+            "Content-Type": content_type_for(path),
+            "Last-Modified": email.utils.formatdate(
+                stat.st_mtime_ns / 1e9, usegmt=True
+            ),
+            "ETag": self.etag,
+        }
+        if os.path.splitext(path)[1] in COMPRESSIBLE_EXTENSIONS:
+            headers["Vary"] = "Accept-Encoding"
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        self.headers = headers
+
+
+class StaticSite:
+    def __init__(
+        self,
+        root,
+        revalidate=1.0,
+        max_cached_file=MAX_CACHED_FILE_BYTES,
+        max_cache_bytes=MAX_CACHE_BYTES,
+    ):
+        self.root = root
+        self.revalidate = revalidate
+        self.max_cached_file = max_cached_file
+        self.max_cache_bytes = max_cache_bytes
+        self.entries = OrderedDict()
+        self.cached_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, url, accept_encoding=""):
+        key = (urlsplit(url).path, accept_encoding)
+        now = time.monotonic()
+        entry = self.entries.get(key)
+        # Files are only stat'ed again once per revalidate interval.
+        if entry is not None and now - entry.checked < self.revalidate:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+        self.misses += 1
+        path = resolve_path(self.root, url)
+        if path is None:
+            self._store(key, None)
+            return None
+        encoding = choose_encoding(accept_encoding, path)
+        body_path = path + SIDECAR_SUFFIXES[encoding] if encoding else path
+        stat = os.stat(body_path)
+        if (
+            entry is not None
+            and entry.body_path == body_path
+            and (entry.mtime_ns, entry.size) == (stat.st_mtime_ns, stat.st_size)
+        ):
+            entry.checked = now
+            data = entry.data
+        else:
+            data = None
+            if stat.st_size <= self.max_cached_file:
+                with open(body_path, "rb") as f:
+                    data = f.read()
+                if len(data) != stat.st_size:
+                    data = None
+            entry = CachedFile(path, body_path, encoding, stat, data, now)
+        self._store(key, entry)
+        return entry
+
+    def _store(self, key, entry):
+        old = self.entries.pop(key, None)
+        if old is not None and old.data is not None:
+            self.cached_bytes -= len(old.data)
+        if entry is None:
+            return
+        self.entries[key] = entry
+        if entry.data is not None:
+            self.cached_bytes += len(entry.data)
+        while self.cached_bytes > self.max_cache_bytes and self.entries:
+            _, evicted = self.entries.popitem(last=False)
+            if evicted.data is not None:
+                self.cached_bytes -= len(evicted.data)
+
+
+def parse_request(head):
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, version = lines[0].split(" ")
+    except ValueError:
+        return None
+    if not version.startswith("HTTP/1."):
+        return None
+    headers = {}
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, separator, value = line.partition(":")
+        if not separator:
+            return None
+        headers[name.strip().lower()] = value.strip()
+    return method, target, version, headers
+
+
+def wants_keep_alive(version, headers):
+    connection = headers.get("connection", "").lower()
+    if version == "HTTP/1.0":
+        return connection == "keep-alive"
+    return connection != "close"
+
+
+def is_not_modified(entry, headers):
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or entry.etag in tags
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            since = email.utils.parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return entry.mtime_ns // 1_000_000_000 <= since.timestamp()
+    return False
+
+
+class StaticServer:
+    def __init__(self, site, keep_alive_timeout=15.0):
+        self.site = site
+        self.keep_alive_timeout = keep_alive_timeout
+        self._date_second = None
+        self._date = None
+
+    def date(self):
+        second = int(time.time())
+        if second != self._date_second:
+            self._date_second = second
+            self._date = email.utils.formatdate(second, usegmt=True)
+        return self._date
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(
+                        reader.readuntil(b"\r\n\r\n"), self.keep_alive_timeout
+                    )
+                except (
+                    asyncio.TimeoutError,
+                    asyncio.IncompleteReadError,
+                    asyncio.LimitOverrunError,
+                    ConnectionError,
+                ):
+                    break
+                request = parse_request(head)
+                if request is None:
+                    await self.send_status(writer, HTTPStatus.BAD_REQUEST, False)
+                    break
+                method, target, version, headers = request
+                keep_alive = wants_keep_alive(version, headers)
+                length = headers.get("content-length", "0")
+                if not length.isdigit():
+                    await self.send_status(writer, HTTPStatus.BAD_REQUEST, False)
+                    break
+                length = int(length)
+                if length:
+                    await reader.readexactly(length)
+                await self.respond(writer, method, target, headers, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def respond(self, writer, method, target, headers, keep_alive):
+        if method not in ("GET", "HEAD"):
+            await self.send_status(
+                writer,
+                HTTPStatus.METHOD_NOT_ALLOWED,
+                keep_alive,
+                {"Allow": "GET, HEAD"},
+            )
+            return
+        entry = self.site.lookup(target, headers.get("accept-encoding", ""))
+        if entry is None:
+            await self.send_status(writer, HTTPStatus.NOT_FOUND, keep_alive)
+            return
+        if is_not_modified(entry, headers):
+            self.write_head(writer, HTTPStatus.NOT_MODIFIED, entry.headers, keep_alive)
+            await writer.drain()
+            return
+        self.write_head(writer, HTTPStatus.OK, entry.headers, keep_alive, entry.size)
+        if method == "HEAD":
+            await writer.drain()
+        elif entry.data is not None:
+            writer.write(entry.data)
+            await writer.drain()
+        else:
+            await writer.drain()
+            with open(entry.body_path, "rb") as f:
+                # Zero-copy os.sendfile for plain sockets; asyncio falls back
+                # to reading and writing chunks where it is unavailable.
+                sent = await asyncio.get_running_loop().sendfile(
+                    writer.transport, f, 0, entry.size
+                )
+            if sent != entry.size:
+                raise ConnectionError("file changed while it was being sent")
+
+    def write_head(self, writer, status, headers, keep_alive, length=None):
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}", f"Date: {self.date()}"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        if length is not None:
+            lines.append(f"Content-Length: {length}")
+        lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+
+    async def send_status(self, writer, status, keep_alive, headers=None):
+        body = f"{status.value} {status.phrase}\n".encode()
+        headers = {"Content-Type": "text/plain; charset=utf-8", **(headers or {})}
+        self.write_head(writer, status, headers, keep_alive, len(body))
+        writer.write(body)
+        await writer.drain()
+
+    async def start(self, host="", port=8888):
+        return await asyncio.start_server(
+            self.handle_connection, host or None, port, limit=MAX_HEADER_BYTES
+        )
+
+
+class ServerThread:
+    def __init__(self, server, host="", port=8888):
+        self._server = server
+        self._started = threading.Event()
+        self._thread = threading.Thread(
+            target=asyncio.run, args=(self._run(host, port),), daemon=True
+        )
+        self._thread.start()
+        self._started.wait()
+
+    async def _run(self, host, port):
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        server = await self._server.start(host, port)
+        self.port = server.sockets[0].getsockname()[1]
+        self._started.set()
+        async with server:
+            await self._stopped.wait()
+
+    def stop(self):
+        self._loop.call_soon_threadsafe(self._stopped.set)
+        self._thread.join()
+
+
+async def serve(site, host="", port=8888):
+    server = await StaticServer(site).start(host, port)
+    print(f"Serving {site.root} on http://localhost:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Serve the built site, using precompressed files when possible"
+    )
+    parser.add_argument("--dir", default="public")
+    parser.add_argument("--host", default="")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument(
+        "--revalidate",
+        type=float,
+        default=1.0,
+        help="seconds a file's metadata is trusted before it is checked again",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=MAX_CACHE_BYTES,
+        help="bytes of small files kept in memory",
+    )
+    args = parser.parse_args(argv)
+
+    site = StaticSite(args.dir, args.revalidate, max_cache_bytes=args.cache_size)
+    try:
+        asyncio.run(serve(site, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
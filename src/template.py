@@ -0,0 +1,51 @@
+import os
+import re
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+_template_cache = {}
+
+
+class Template:
+    def __init__(self, source):
+        self.segments = []
+        self.slots = []
+        start = 0
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            self.segments.append(source[start : match.start()])
+            self.slots.append((match.group(1), match.group(0)))
+            start = match.end()
+        self.segments.append(source[start:])
+
+    def render(self, values):
+        parts = [self.segments[0]]
+        for (name, placeholder), segment in zip(self.slots, self.segments[1:]):
+            value = values.get(name, placeholder)
+            parts.append(value if isinstance(value, str) else value.to_html())
+            parts.append(segment)
+        return "".join(parts)
+
+    def write(self, fp, values):
+        fp.write(self.segments[0])
+        for (name, placeholder), segment in zip(self.slots, self.segments[1:]):
+            value = values.get(name, placeholder)
+            if isinstance(value, str):
+                fp.write(value)
+            else:
+                value.write_html(fp)
+            fp.write(segment)
+
+
+def load_template(path):
+    mtime = os.stat(path).st_mtime_ns
+    cached = _template_cache.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(path) as f:
+        template = Template(f.read())
+    _template_cache[path] = (mtime, template)
+    return template
+
+
+def clear_template_cache():
+    _template_cache.clear()
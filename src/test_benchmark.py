@@ -0,0 +1,55 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from benchmark import SHAPES, generate_corpus, run_benchmark
+from generate_content import extract_title
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_generate_corpus_is_deterministic(self):
+        with (
+            tempfile.TemporaryDirectory() as first,
+            tempfile.TemporaryDirectory() as second,
+        ):
+            first_paths = generate_corpus(first, 5, "deep", seed=3)
+            second_paths = generate_corpus(second, 5, "deep", seed=3)
+            self.assertEqual(
+                [os.path.relpath(path, first) for path in first_paths],
+                [os.path.relpath(path, second) for path in second_paths],
+            )
+            for first_path, second_path in zip(first_paths, second_paths):
+                with open(first_path) as f, open(second_path) as g:
+                    self.assertEqual(f.read(), g.read())
+
+    def test_generate_corpus_pages_have_titles(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for i, path in enumerate(generate_corpus(tmp, 3, "mixed")):
+                with open(path) as f:
+                    self.assertEqual(extract_title(f.read()), f"Page {i}")
+
+    def test_run_benchmark_reports_every_stage(self):
+        for shape_name in SHAPES:
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = run_benchmark(2, shape_name)
+            self.assertEqual(
+                list(result["stages"]),
+                [
+                    "markdown_to_blocks",
+                    "text_to_textnodes",
+                    "markdown_to_html_node",
+                    "to_html",
+                    "generate_pages_recursive",
+                ],
+            )
+
+    def test_run_benchmark_measures_memory(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = run_benchmark(2, "mixed", memory=True)
+        self.assertGreater(result["memory"]["peak_traced_mb"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
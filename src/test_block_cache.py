@@ -0,0 +1,79 @@
+import io
+import os
+import tempfile
+import unittest
+
+import block_cache
+from block_cache import BlockCache
+from dependency_graph import PageReferences
+from markdown_blocks import MarkdownHTMLStream, markdown_to_html_node
+
+
+class TestBlockCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = BlockCache(maxsize=2)
+        cache.put("a", "<p>a</p>")
+        cache.put("b", "<p>b</p>")
+        self.assertEqual(cache.get("a"), "<p>a</p>")
+        cache.put("c", "<p>c</p>")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(list(cache.entries), ["a", "c"])
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_disk_store_persists_across_caches(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            first = BlockCache(path=tmp)
+            key = first.key("> quote")
+            first.put(key, "<blockquote>quote</blockquote>")
+            second = BlockCache(path=tmp)
+            self.assertEqual(second.get(key), "<blockquote>quote</blockquote>")
+            self.assertEqual((second.hits, second.disk_hits), (1, 1))
+            self.assertTrue(
+                os.path.exists(os.path.join(tmp, key[:2], f"{key}.html"))
+            )
+
+    def test_take_and_add_counts(self):
+        cache = BlockCache()
+        cache.get("missing")
+        counts = cache.take_counts()
+        self.assertEqual(counts, (0, 0, 1))
+        self.assertEqual(cache.misses, 0)
+        cache.add_counts(counts)
+        self.assertEqual(cache.misses, 1)
+
+
+class TestCachedRendering(unittest.TestCase):
+    def setUp(self):
+        self.cache = block_cache.configure()
+        self.addCleanup(block_cache.disable)
+
+    def test_markdown_to_html_node_uses_cache(self):
+        md = "# Title\n\nShared *disclaimer*\n\nShared *disclaimer*"
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(
+            html,
+            "<div><h1>Title</h1><p>Shared <i>disclaimer</i></p>"
+            "<p>Shared <i>disclaimer</i></p></div>",
+        )
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+        self.assertEqual(markdown_to_html_node(md).to_html(), html)
+        self.assertEqual((self.cache.hits, self.cache.misses), (4, 2))
+
+    def test_stream_uses_cache(self):
+        markdown_to_html_node("* shared list")
+        fp = io.StringIO()
+        MarkdownHTMLStream(["* shared list"]).write_html(fp)
+        self.assertEqual(fp.getvalue(), "<div><ul><li>shared list</li></ul></div>")
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_blocks_with_links_bypass_cache_when_collecting_references(self):
+        md = "[home](/)\n\n[home](/)"
+        markdown_to_html_node(md)
+        references = PageReferences()
+        html = markdown_to_html_node(md, references).to_html()
+        self.assertEqual(html, markdown_to_html_node(md).to_html())
+        self.assertEqual(references.links, [("/", 1), ("/", 3)])
+
+
+if __name__ == "__main__":
+    unittest.main()
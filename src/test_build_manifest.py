@@ -0,0 +1,81 @@
+import os
+import unittest
+
+from build_manifest import BuildManifest
+from test_support import TempTreeTestCase
+
+
+class TestBuildManifest(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.source = self.write("index.md", "# Title")
+        self.template = self.write("template.html", "{{ Content }}")
+        self.dest = self.write("index.html", "<h1>Title</h1>")
+
+    def test_unrecorded_page_is_not_current(self):
+        manifest = BuildManifest()
+        self.assertFalse(manifest.is_current(self.source, self.template, self.dest))
+
+    def test_recorded_page_is_current(self):
+        manifest = BuildManifest()
+        manifest.record(self.source, self.template, self.dest)
+        self.assertTrue(manifest.is_current(self.source, self.template, self.dest))
+
+    def test_changed_source_is_not_current(self):
+        manifest = BuildManifest()
+        manifest.record(self.source, self.template, self.dest)
+        self.write("index.md", "# New title")
+        self.assertFalse(
+            BuildManifest(manifest.pages).is_current(
+                self.source, self.template, self.dest
+            )
+        )
+
+    def test_changed_template_is_not_current(self):
+        manifest = BuildManifest()
+        manifest.record(self.source, self.template, self.dest)
+        self.write("template.html", "<main>{{ Content }}</main>")
+        self.assertFalse(
+            BuildManifest(manifest.pages).is_current(
+                self.source, self.template, self.dest
+            )
+        )
+
+    def test_changed_build_options_are_not_current(self):
+        manifest = BuildManifest()
+        manifest.record(self.source, self.template, self.dest)
+        manifest = BuildManifest(manifest.pages, options={"minify": True})
+        self.assertFalse(manifest.is_current(self.source, self.template, self.dest))
+        manifest.record(self.source, self.template, self.dest)
+        self.assertTrue(manifest.is_current(self.source, self.template, self.dest))
+
+    def test_missing_output_is_not_current(self):
+        manifest = BuildManifest()
+        manifest.record(self.source, self.template, self.dest)
+        os.remove(self.dest)
+        self.assertFalse(manifest.is_current(self.source, self.template, self.dest))
+
+    def test_save_and_load(self):
+        manifest = BuildManifest()
+        manifest.record(self.source, self.template, self.dest)
+        manifest_path = os.path.join(self.root, "manifest.json")
+        manifest.save(manifest_path)
+        loaded = BuildManifest.load(manifest_path)
+        self.assertEqual(loaded.pages, manifest.pages)
+        self.assertTrue(loaded.is_current(self.source, self.template, self.dest))
+
+    def test_load_missing_manifest(self):
+        manifest = BuildManifest.load(os.path.join(self.root, "missing.json"))
+        self.assertEqual(manifest.pages, {})
+
+    def test_remove_stale_pages(self):
+        manifest = BuildManifest()
+        manifest.record(self.source, self.template, self.dest)
+        fresh = BuildManifest(manifest.pages)
+        fresh.remove_stale_pages()
+        self.assertEqual(fresh.pages, {})
+        self.assertFalse(os.path.exists(self.dest))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import contextlib
+import gzip
+import io
+import os
+import unittest
+
+from compress import compress_file, compress_outputs, find_compressible
+from test_support import TempTreeTestCase
+
+
+class TestCompress(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.page = self.write("index.html", "<p>hello</p>" * 100)
+
+    def test_compress_file_writes_gzip_sidecar(self):
+        self.assertEqual(compress_file(self.page, ["gzip"]), (1, 0))
+        with gzip.open(self.page + ".gz", "rt") as f:
+            self.assertEqual(f.read(), "<p>hello</p>" * 100)
+        self.assertEqual(
+            os.stat(self.page + ".gz").st_mtime_ns, os.stat(self.page).st_mtime_ns
+        )
+
+    def test_unchanged_output_is_not_recompressed(self):
+        compress_file(self.page, ["gzip"])
+        self.assertEqual(compress_file(self.page, ["gzip"]), (0, 1))
+        self.write("index.html", "<p>changed</p>" * 100)
+        os.utime(self.page, ns=(0, os.stat(self.page).st_mtime_ns + 1))
+        self.assertEqual(compress_file(self.page, ["gzip"]), (1, 0))
+
+    def test_incompressible_output_has_no_sidecar(self):
+        tiny = self.write("tiny.css", "a{}")
+        self.assertEqual(compress_file(tiny, ["gzip"]), (0, 0))
+        self.assertFalse(os.path.exists(tiny + ".gz"))
+
+    def test_find_compressible_removes_orphaned_sidecars(self):
+        self.write("image.png", "png")
+        orphan = self.write("gone.html.gz", "")
+        archive = self.write("data.tar.gz", "")
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(find_compressible(self.root), [self.page])
+        self.assertFalse(os.path.exists(orphan))
+        self.assertTrue(os.path.exists(archive))
+
+    def test_compress_outputs(self):
+        self.write("posts/first.html", "<p>first</p>" * 100)
+        stats = compress_outputs(self.root, workers=2, encodings=["gzip"])
+        self.assertGreaterEqual(stats.written, 2)
+        sidecar = os.path.join(self.root, "posts", "first.html.gz")
+        self.assertTrue(os.path.exists(sidecar))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import contextlib
+import io
+import os
+import unittest
+
+from dependency_graph import DependencyGraph, PageReferences, resolve_target
+from generate_content import generate_pages_parallel, generate_pages_recursive
+from markdown_blocks import markdown_to_html_node
+from test_support import TempTreeTestCase
+
+
+def find_references(markdown):
+    references = PageReferences()
+    markdown_to_html_node(markdown, references)
+    return references
+
+
+class TestFindReferences(unittest.TestCase):
+    def test_internal_links_and_images_with_lines(self):
+        references = find_references(
+            "# Title\n\nRead [this](/majesty) and [that](https://example.com)\n\n"
+            "![elf](/images/elf.png)"
+        )
+        self.assertEqual(references.links, [("/majesty", 3)])
+        self.assertEqual(references.assets, [("/images/elf.png", 5)])
+
+    def test_ignores_fenced_code_and_anchors(self):
+        references = find_references(
+            "```\n[code](/not-a-link)\n```\n\n[top](#top) [next](next.html)"
+        )
+        self.assertEqual(references.links, [("next.html", 5)])
+
+    def test_ignores_links_inside_code_spans(self):
+        references = find_references("Use `[text](/nowhere)` syntax, [x](/here)")
+        self.assertEqual(references.links, [("/here", 1)])
+
+    def test_resolve_target(self):
+        self.assertEqual(
+            resolve_target("/majesty", "public/index.html", "public"),
+            os.path.join("public", "majesty"),
+        )
+        self.assertEqual(
+            resolve_target("../other.html#part", "public/posts/a.html", "public"),
+            os.path.join("public", "other.html"),
+        )
+
+
+class TestDependencyGraph(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.public = os.path.join(self.root, "public")
+        self.template = self.write("template.html", "{{ Content }}")
+        self.home = self.write("content/index.md", "# Home\n\n[Majesty](/majesty)")
+        self.majesty = self.write(
+            "content/majesty/index.md", "# Majesty\n\n![elf](/images/elf.png)"
+        )
+        self.lonely = self.write("content/lonely.md", "# Lonely")
+        self.image = self.write("static/images/elf.png", "png")
+
+    def build(self, generate=generate_pages_recursive, **kwargs):
+        graph = DependencyGraph(self.content, self.static, self.public)
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate(self.content, self.template, self.public, graph=graph, **kwargs)
+        return graph
+
+    def test_changed_page_affects_pages_linking_to_it(self):
+        graph = self.build()
+        self.assertEqual(
+            graph.affected_pages([self.majesty]), [self.home, self.majesty]
+        )
+        self.assertEqual(graph.affected_pages([self.lonely]), [self.lonely])
+
+    def test_changed_paths_may_be_relative_or_absolute(self):
+        graph = self.build()
+        relative = os.path.relpath(self.majesty)
+        self.assertEqual(graph.affected_pages([relative]), [self.home, self.majesty])
+        graph = DependencyGraph(
+            os.path.relpath(self.content),
+            os.path.relpath(self.static),
+            os.path.relpath(self.public),
+            {os.path.relpath(path): entry for path, entry in graph.pages.items()},
+        )
+        self.assertEqual(len(graph.affected_pages([self.majesty])), 2)
+
+    def test_changed_asset_affects_pages_using_it(self):
+        graph = self.build()
+        self.assertEqual(graph.affected_pages([self.image]), [self.majesty])
+
+    def test_changed_template_affects_every_page(self):
+        graph = self.build()
+        self.assertEqual(
+            graph.affected_pages([self.template]),
+            sorted([self.home, self.majesty, self.lonely]),
+        )
+
+    def test_parallel_build_records_the_same_graph(self):
+        graph = self.build(generate_pages_parallel, workers=2)
+        self.assertEqual(graph.pages, self.build().pages)
+
+    def test_save_and_load(self):
+        graph = self.build()
+        path = os.path.join(self.root, "graph.json")
+        graph.save(path)
+        loaded = DependencyGraph.load(path, self.content, self.static, self.public)
+        self.assertEqual(loaded.pages, graph.pages)
+
+
+if __name__ == "__main__":
+    unittest.main()
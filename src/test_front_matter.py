@@ -0,0 +1,113 @@
+import datetime
+import io
+import unittest
+
+from front_matter import (
+    MetadataIndex,
+    read_front_matter,
+    read_page_metadata,
+    split_front_matter,
+    template_values,
+)
+from test_support import TempTreeTestCase
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_split_front_matter(self):
+        markdown = (
+            "---\n"
+            "title: \"Hello: world\"\n"
+            "date: 2024-01-05\n"
+            "# a comment\n"
+            "tags: [python, web]\n"
+            "draft: true\n"
+            "---\n"
+            "# Body\n"
+        )
+        fields, body = split_front_matter(markdown)
+        self.assertEqual(
+            fields,
+            {
+                "title": "Hello: world",
+                "date": datetime.date(2024, 1, 5),
+                "tags": ["python", "web"],
+                "draft": True,
+            },
+        )
+        self.assertEqual(body, "# Body\n")
+
+    def test_block_lists_and_empty_front_matter(self):
+        fields, body = split_front_matter("---\ntags:\n  - a\n  - b\n---")
+        self.assertEqual((fields, body), ({"tags": ["a", "b"]}, ""))
+        self.assertEqual(split_front_matter("---\n---\nbody"), ({}, "body"))
+        self.assertEqual(split_front_matter("# Title\n---\n"), ({}, "# Title\n---\n"))
+
+    def test_invalid_front_matter(self):
+        with self.assertRaises(ValueError):
+            split_front_matter("---\ntitle: unterminated\n# Body\n")
+        with self.assertRaises(ValueError):
+            split_front_matter("---\nnot a field\n---\n")
+
+    def test_template_values_include_every_field(self):
+        fields, _ = split_front_matter(
+            "---\nauthor: Ann\ndate: 2024-01-05\ntags: [a, b]\ndraft: false\n---\n"
+        )
+        self.assertEqual(
+            template_values(fields),
+            {
+                "author": "Ann",
+                "Author": "Ann",
+                "date": "2024-01-05",
+                "Date": "2024-01-05",
+                "tags": "a, b",
+                "Tags": "a, b",
+                "draft": "false",
+                "Draft": "false",
+            },
+        )
+        self.assertEqual(template_values({}), {"Date": "", "Tags": ""})
+
+    def test_read_front_matter_leaves_file_at_body(self):
+        source = io.StringIO("---\ntitle: T\n---\n# Body\n")
+        self.assertEqual(read_front_matter(source), ({"title": "T"}, 3))
+        self.assertEqual(source.read(), "# Body\n")
+        source = io.StringIO("# Body\n")
+        self.assertEqual(read_front_matter(source), ({}, 0))
+        self.assertEqual(source.read(), "# Body\n")
+
+
+class TestMetadataIndex(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        sources = [
+            self.write("old.md", "---\ndate: 2023-06-01\ntags: [a]\n---\n# Old\n"),
+            self.write("new.md", "---\ndate: 2024-02-01\ntags: [a, b]\n---\n# New\n"),
+            self.write("draft.md", "---\ntitle: Draft\ndraft: true\ntags: c\n---\n"),
+            self.write("plain.md", "Intro\n\n# Plain\n"),
+        ]
+        self.pages = [(path, path[:-3] + ".html") for path in sources]
+
+    def test_read_page_metadata_uses_heading_without_title_field(self):
+        page = read_page_metadata(*self.pages[3])
+        self.assertEqual((page.title, page.date, page.tags), ("Plain", None, []))
+        self.assertEqual(read_page_metadata(*self.pages[2]).tags, ["c"])
+
+    def test_index_queries(self):
+        index = MetadataIndex(self.pages)
+        self.assertEqual(
+            [page.title for page in index.pages()], ["New", "Old", "Plain"]
+        )
+        self.assertEqual(len(index.pages(drafts=True)), 4)
+        self.assertEqual(list(index.tags()), ["a", "b"])
+        self.assertEqual([page.title for page in index.tagged("a")], ["New", "Old"])
+        self.assertTrue(index.get(self.pages[2][0]).draft)
+
+    def test_index_reads_pages_on_lookup(self):
+        index = MetadataIndex(self.pages)
+        self.assertEqual(index.by_path, {})
+        self.assertEqual(index.get(self.pages[0][0]).title, "Old")
+        self.assertEqual(list(index.by_path), [self.pages[0][0]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,22 @@
+import contextlib
+import io
+import os
 import unittest
 
-from generate_content import extract_title
+import front_matter
+from build_manifest import BuildManifest
+from generate_content import (
+    copy_dir,
+    extract_title,
+    files_match,
+    find_pages,
+    generate_page,
+    generate_page_streaming,
+    generate_pages_parallel,
+    generate_pages_recursive,
+    sync_dir,
+)
+from test_support import TempTreeTestCase
 
 
 class TestExtractTitle(unittest.TestCase):
@@ -13,3 +29,179 @@ class TestExtractTitle(unittest.TestCase):
         markdown = "Text with no title\ntext with no title"
         with self.assertRaises(ValueError, msg="No title line found"):
             extract_title(markdown)
+
+    def test_extract_title_prefers_front_matter(self):
+        markdown = "---\ntitle: From front matter\n---\n# Header 1\n"
+        self.assertEqual(extract_title(markdown), "From front matter")
+        self.assertEqual(extract_title("---\ndate: 2024-01-05\n---\n# H\n"), "H")
+
+
+class TestGeneratePages(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.public = os.path.join(self.root, "public")
+        self.template = self.write(
+            "template.html", "<title>{{ Title }}</title>{{ Content }}"
+        )
+        self.write("content/index.md", "# Home\n\nWelcome")
+        self.write("content/posts/first.md", "# First\n\nA *post*")
+
+    def test_find_pages(self):
+        self.assertEqual(
+            find_pages(self.content, self.public),
+            [
+                (
+                    os.path.join(self.content, "index.md"),
+                    os.path.join(self.public, "index.html"),
+                ),
+                (
+                    os.path.join(self.content, "posts", "first.md"),
+                    os.path.join(self.public, "posts", "first.html"),
+                ),
+            ],
+        )
+
+    def test_generate_pages_parallel(self):
+        generate_pages_parallel(self.content, self.template, self.public, workers=2)
+        self.assertEqual(
+            self.read("public/index.html"),
+            "<title>Home</title><div><h1>Home</h1><p>Welcome</p></div>",
+        )
+        self.assertEqual(
+            self.read("public/posts/first.html"),
+            "<title>First</title><div><h1>First</h1><p>A <i>post</i></p></div>",
+        )
+
+    def test_generate_pages_parallel_reports_failures(self):
+        self.write("content/untitled.md", "No title here")
+        with self.assertRaises(RuntimeError):
+            generate_pages_parallel(
+                self.content, self.template, self.public, workers=2
+            )
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.html")))
+
+    def test_generate_page_streaming_matches_generate_page(self):
+        source = self.write(
+            "content/long.md",
+            "Intro with *emphasis*\n\n# Long\n\n* one\n* two\n\n"
+            "```\ncode\n\nmore\n```\n",
+        )
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_page(source, self.template, os.path.join(self.public, "a.html"))
+        generate_page_streaming(
+            source, self.template, os.path.join(self.public, "b.html")
+        )
+        self.assertEqual(self.read("public/a.html"), self.read("public/b.html"))
+
+    def test_front_matter_is_stripped_and_fills_placeholders(self):
+        template = self.write(
+            "dated.html",
+            "<title>{{ Title }}</title>{{ Date }}|{{ Tags }}|{{ Author }}{{ Content }}",
+        )
+        source = self.write(
+            "content/dated.md",
+            "---\ntitle: Dated\ndate: 2024-01-05\ntags: [a, b]\nauthor: Ann\n---\n"
+            "Body with [a link](/missing)\n",
+        )
+        expected = "<title>Dated</title>2024-01-05|a, b|Ann<div><p>Body with "
+        with contextlib.redirect_stdout(io.StringIO()):
+            references = generate_page(
+                source, template, os.path.join(self.public, "a.html"), True
+            )
+        streamed = generate_page_streaming(
+            source, template, os.path.join(self.public, "b.html"), True
+        )
+        self.assertTrue(self.read("public/a.html").startswith(expected))
+        self.assertEqual(self.read("public/a.html"), self.read("public/b.html"))
+        self.assertEqual(references.links, [("/missing", 7)])
+        self.assertEqual(streamed.links, references.links)
+
+    def test_draft_pages_are_skipped_unless_drafts_are_included(self):
+        draft = os.path.join(self.public, "posts", "draft.html")
+        self.write("public/posts/draft.html", "published before")
+        source = self.write(
+            "content/posts/draft.md", "---\ndraft: true\n---\n# Draft\n"
+        )
+        manifest = BuildManifest()
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(
+                self.content, self.template, self.public, manifest
+            )
+        self.assertFalse(os.path.exists(draft))
+        self.assertNotIn(source, manifest.pages)
+        generate_pages_parallel(self.content, self.template, self.public, workers=2)
+        self.assertFalse(os.path.exists(draft))
+
+        front_matter.include_drafts = True
+        self.addCleanup(setattr, front_matter, "include_drafts", False)
+        generate_pages_parallel(self.content, self.template, self.public, workers=2)
+        self.assertTrue(self.read("public/posts/draft.html").startswith("<title>"))
+
+
+class TestSyncDir(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.root, "static")
+        self.public = os.path.join(self.root, "public")
+        self.write("static/index.css", "body {}")
+        self.write("static/images/logo.png", "png")
+
+    def test_sync_dir_copies_files(self):
+        synced = sync_dir(self.static, self.public)
+        self.assertEqual(
+            synced,
+            [
+                os.path.join(self.public, "images", "logo.png"),
+                os.path.join(self.public, "index.css"),
+            ],
+        )
+        for path in synced:
+            self.assertTrue(os.path.isfile(path))
+
+    def test_sync_dir_skips_unchanged_files(self):
+        sync_dir(self.static, self.public)
+        destination = os.path.join(self.public, "index.css")
+        inode = os.stat(destination).st_ino
+        sync_dir(self.static, self.public)
+        self.assertEqual(os.stat(destination).st_ino, inode)
+
+    def test_sync_dir_copies_changed_files(self):
+        sync_dir(self.static, self.public)
+        self.write("static/index.css", "body { margin: 0 }")
+        sync_dir(self.static, self.public)
+        with open(os.path.join(self.public, "index.css")) as f:
+            self.assertEqual(f.read(), "body { margin: 0 }")
+
+    def test_sync_dir_removes_orphans_but_keeps_other_files(self):
+        previous = sync_dir(self.static, self.public)
+        page = self.write("public/index.html", "<p></p>")
+        os.remove(os.path.join(self.static, "index.css"))
+        sync_dir(self.static, self.public, previous)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.css")))
+        self.assertTrue(os.path.exists(page))
+
+    def test_copy_dir_keeps_rendered_pages(self):
+        page = self.write("public/index.html", "<p></p>")
+        orphan = self.write("public/old.css", "")
+        with contextlib.redirect_stdout(io.StringIO()):
+            copy_dir(self.static, self.public, keep=[page])
+        self.assertTrue(os.path.exists(page))
+        self.assertFalse(os.path.exists(orphan))
+        self.assertEqual(self.read("public/index.css"), "body {}")
+
+    def test_sync_dir_with_links(self):
+        sync_dir(self.static, self.public, link=True)
+        self.assertTrue(
+            os.path.samefile(
+                os.path.join(self.static, "index.css"),
+                os.path.join(self.public, "index.css"),
+            )
+        )
+
+    def test_files_match_by_hash(self):
+        source = self.write("a.txt", "same")
+        destination = self.write("b.txt", "same")
+        self.assertTrue(files_match(source, destination, compare_hash=True))
+        self.write("b.txt", "diff")
+        self.assertFalse(files_match(source, destination, compare_hash=True))
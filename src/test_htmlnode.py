@@ -1,3 +1,4 @@
+import io
 import unittest
 
 from htmlnode import HTMLNode, LeafNode, ParentNode
@@ -40,6 +41,14 @@ class TestHTMLNode(unittest.TestCase):
         )
         self.assertTrue(self.html_node, other_node)
 
+    def test_nodes_have_no_instance_dict(self):
+        for node in (
+            self.html_node,
+            LeafNode("text", "b"),
+            ParentNode("p", [LeafNode("text")]),
+        ):
+            self.assertFalse(hasattr(node, "__dict__"))
+
 
 class TestLeafNode(unittest.TestCase):
     leaf_node = LeafNode(
@@ -116,6 +125,27 @@ class TestParentNode(unittest.TestCase):
             '<div><p><b>Bold text</b>Normal text<a href="https://www.boot.dev">this is a link</a></p><p>Normal text<i>italic text</i>Normal text</p></div>',
         )
 
+    def test_iter_html(self):
+        self.assertEqual(
+            list(self.parent_node.iter_html()),
+            [
+                "<p>",
+                "<b>Bold text</b>",
+                "Normal text",
+                "<i>italic text</i>",
+                "Normal text",
+                "</p>",
+            ],
+        )
+
+    def test_write_html(self):
+        fp = io.StringIO()
+        ParentNode("div", [self.parent_node], {"class": "post"}).write_html(fp)
+        self.assertEqual(
+            fp.getvalue(),
+            '<div class="post"><p><b>Bold text</b>Normal text<i>italic text</i>Normal text</p></div>',
+        )
+
     def test_to_html_with_no_children(self):
         childless_parent_node = ParentNode(
             tag="p",
@@ -0,0 +1,165 @@
+import contextlib
+import io
+import os
+import random
+import unittest
+import zlib
+
+import image_pipeline
+from build_manifest import BuildManifest
+from generate_content import build_options, generate_pages_recursive
+from image_pipeline import (
+    PNG_SIGNATURE,
+    PNGImage,
+    _chunk,
+    _unfilter,
+    encode_png,
+    process_image,
+    read_png,
+    resize,
+)
+from test_support import TempTreeTestCase
+from textnode import TextType, text_to_html_node
+
+
+def filter_row(filter_type, row, previous, bpp):
+    filtered = bytearray()
+    for i, value in enumerate(row):
+        left = row[i - bpp] if i >= bpp else 0
+        up = previous[i]
+        up_left = previous[i - bpp] if i >= bpp else 0
+        if filter_type == 0:
+            predictor = 0
+        elif filter_type == 1:
+            predictor = left
+        elif filter_type == 2:
+            predictor = up
+        elif filter_type == 3:
+            predictor = (left + up) // 2
+        else:
+            estimate = left + up - up_left
+            predictor = min(
+                (left, up, up_left), key=lambda value: abs(estimate - value)
+            )
+        filtered.append((value - predictor) & 255)
+    return bytes([filter_type]) + bytes(filtered)
+
+
+class TestPNGCodec(TempTreeTestCase):
+    def test_round_trip(self):
+        rng = random.Random(0)
+        rows = [bytes(rng.randrange(256) for _ in range(5 * 3)) for _ in range(4)]
+        image = PNGImage(5, 4, 3, rows)
+        self.assertEqual(read_png(self.write("a.png", encode_png(image))), image)
+
+    def test_unfilter_every_filter_type(self):
+        rng = random.Random(1)
+        rows = [bytes(rng.randrange(256) for _ in range(12)) for _ in range(5)]
+        raw = b""
+        previous = bytes(12)
+        for filter_type, row in enumerate(rows):
+            raw += filter_row(filter_type, row, previous, 3)
+            previous = row
+        self.assertEqual(_unfilter(raw, 5, 12, 3), rows)
+
+    def test_palette_is_expanded(self):
+        header = (2).to_bytes(4, "big") * 2 + bytes([8, 3, 0, 0, 0])
+        data = (
+            PNG_SIGNATURE
+            + _chunk(b"IHDR", header)
+            + _chunk(b"PLTE", b"\xff\x00\x00\x00\x00\xff")
+            + _chunk(b"IDAT", zlib.compress(b"\x00\x00\x01\x00\x01\x00"))
+            + _chunk(b"IEND", b"")
+        )
+        image = read_png(self.write("p.png", data))
+        self.assertEqual(image.channels, 3)
+        self.assertEqual(
+            image.rows, [b"\xff\x00\x00\x00\x00\xff", b"\x00\x00\xff\xff\x00\x00"]
+        )
+
+    def test_resize_averages_pixels(self):
+        image = PNGImage(4, 2, 1, [bytes([0, 10, 20, 30]), bytes([40, 50, 60, 70])])
+        self.assertEqual(resize(image, 2), PNGImage(2, 1, 1, [bytes([25, 45])]))
+        self.assertIs(resize(image, 8), image)
+
+
+class TestImagePipeline(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.root, "static")
+        self.public = os.path.join(self.root, "public")
+        self.cache = os.path.join(self.root, "cache")
+        rows = [bytes((x * 16 + y) % 256 for x in range(8 * 3)) for y in range(4)]
+        self.source = self.write(
+            "static/images/elf.png", encode_png(PNGImage(8, 4, 3, rows), level=0)
+        )
+        self.addCleanup(image_pipeline.disable)
+
+    def test_process_image_writes_and_reuses_derivatives(self):
+        dest = os.path.join(self.public, "images", "elf.png")
+        generated = process_image(self.source, dest, self.cache, [4, 8], 9)
+        self.assertEqual(generated, (2, 0))
+        small = read_png(os.path.join(self.public, "images", "elf-4w.png"))
+        self.assertEqual((small.width, small.height), (4, 2))
+        full = os.path.join(self.public, "images", "elf-8w.png")
+        self.assertLess(os.path.getsize(full), os.path.getsize(self.source))
+        reused = process_image(self.source, dest, self.cache, [4, 8], 9)
+        self.assertEqual(reused, (0, 2))
+
+    def test_pipeline_processes_static_images(self):
+        images = image_pipeline.configure(self.static, self.cache, [4, 16])
+        images.start(self.public, workers=1)
+        images.finish()
+        self.assertEqual((images.generated, images.reused), (2, 0))
+        small = os.path.join(self.public, "images", "elf-4w.png")
+        self.assertTrue(os.path.exists(small))
+
+    def test_image_nodes_get_dimensions_and_srcset(self):
+        image_pipeline.configure(self.static, self.cache, [4, 16])
+        node = text_to_html_node("elf", TextType.IMAGE, "/images/elf.png")
+        self.assertEqual(
+            node.to_html(),
+            '<img src="/images/elf.png" alt="elf" width="8" height="4" '
+            'srcset="/images/elf-4w.png 4w, /images/elf-8w.png 8w" '
+            'loading="lazy"></img>',
+        )
+
+    def test_unknown_images_are_only_lazy(self):
+        image_pipeline.configure(self.static, self.cache)
+        url = "https://example.com/orc.png"
+        node = text_to_html_node("orc", TextType.IMAGE, url)
+        self.assertEqual(node.props, {"src": url, "alt": "orc", "loading": "lazy"})
+
+    def test_directories_and_truncated_files_are_not_images(self):
+        images = image_pipeline.configure(self.static, self.cache)
+        with open(self.source, "rb") as f:
+            data = f.read()
+        with open(os.path.join(self.static, "images", "cut.png"), "wb") as f:
+            f.write(data[:20])
+        self.assertEqual(images.attributes("/images"), {"loading": "lazy"})
+        self.assertEqual(images.attributes("/images/cut.png"), {"loading": "lazy"})
+        self.assertEqual([path for path, _ in images.find_images()], [self.source])
+
+    def test_incremental_pages_depend_on_image_settings_and_files(self):
+        content = os.path.join(self.root, "content")
+        page = self.write("content/index.md", "# Elf\n\n![elf](/images/elf.png)")
+        template = self.write("template.html", "{{ Content }}")
+        dest = os.path.join(self.public, "index.html")
+
+        image_pipeline.configure(self.static, self.cache, [4, 16])
+        manifest = BuildManifest(options=build_options())
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(content, template, self.public, manifest)
+        self.assertEqual(list(manifest.pages[page]["assets"]), [self.source])
+        self.assertTrue(manifest.is_current(page, template, dest))
+
+        image_pipeline.configure(self.static, self.cache, [4])
+        self.assertNotEqual(build_options(), manifest.options)
+        with open(self.source, "wb") as f:
+            f.write(encode_png(PNGImage(2, 2, 1, [b"\0\0", b"\0\0"]), level=0))
+        manifest = BuildManifest(manifest.pages, options=manifest.options)
+        self.assertFalse(manifest.is_current(page, template, dest))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,9 +6,11 @@ from inline_markdown import (
     extract_markdown_links,
     split_nodes_image,
     split_nodes_link,
+    text_to_html_nodes,
     text_to_textnodes,
 )
-from textnode import TextNode, TextType
+from htmlnode import LeafNode
+from textnode import TextNode, TextType, text_node_to_html_node
 
 
 class TestSplitNodesDelimiter(unittest.TestCase):
@@ -279,6 +281,14 @@ class TestSplitNodesLink(unittest.TestCase):
         actual = split_nodes_link([node])
         self.assertEqual(actual, expected)
 
+    def test_split_nodes_link_matching_image_text(self):
+        node = TextNode("![a](b) and [a](b)", TextType.TEXT)
+        expected = [
+            TextNode("![a](b) and ", TextType.TEXT),
+            TextNode("a", TextType.LINK, "b"),
+        ]
+        self.assertEqual(split_nodes_link([node]), expected)
+
 
 class TestSplitNodesImage(unittest.TestCase):
     def test_split_nodes_image(self):
@@ -414,3 +424,46 @@ class TestTextToTextNodes(unittest.TestCase):
         text = "*test test test*"
         actual = text_to_textnodes(text)
         self.assertEqual(actual, [TextNode("test test test", TextType.ITALIC)])
+
+    def test_text_to_textnodes_with_single_repeated_character(self):
+        self.assertEqual(text_to_textnodes("I"), [TextNode("I", TextType.TEXT)])
+        self.assertEqual(
+            text_to_textnodes("*italic*!"),
+            [TextNode("italic", TextType.ITALIC), TextNode("!", TextType.TEXT)],
+        )
+
+    def test_text_to_textnodes_with_many_delimiters(self):
+        text = "*italic* and **bold** and `code` " * 5000
+        actual = text_to_textnodes(text)
+        self.assertEqual(len(actual), 30000)
+        self.assertEqual(actual[-1], TextNode(" ", TextType.TEXT))
+
+
+class TestTextToHTMLNodes(unittest.TestCase):
+    def test_text_to_html_nodes(self):
+        text = "This is **text** with an *italic* word and a `code block` and an ![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) and a [link](https://boot.dev)"
+        actual = text_to_html_nodes(text)
+        expected = [
+            LeafNode("This is "),
+            LeafNode("text", "b"),
+            LeafNode(" with an "),
+            LeafNode("italic", "i"),
+            LeafNode(" word and a "),
+            LeafNode("code block", "code"),
+            LeafNode(" and an "),
+            LeafNode(
+                "",
+                "img",
+                {"src": "https://i.imgur.com/fJRm4Vk.jpeg", "alt": "obi wan image"},
+            ),
+            LeafNode(" and a "),
+            LeafNode("link", "a", {"href": "https://boot.dev"}),
+        ]
+        self.assertEqual(actual, expected)
+
+    def test_text_to_html_nodes_matches_text_nodes(self):
+        text = "**Bold****Still Bold** and *italic* with ![](/a.png) and [b](/b)"
+        self.assertEqual(
+            text_to_html_nodes(text),
+            [text_node_to_html_node(node) for node in text_to_textnodes(text)],
+        )
@@ -0,0 +1,104 @@
+import contextlib
+import io
+import os
+import unittest
+
+from build_manifest import BuildManifest
+from dependency_graph import DependencyGraph, PageReferences
+from generate_content import generate_pages_recursive
+from link_checker import BrokenLink, find_broken_links
+from test_support import TempTreeTestCase
+
+
+class TestFindBrokenLinks(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.public = os.path.join(self.root, "public")
+        self.template = self.write("template.html", "{{ Content }}")
+        self.write("static/images/elf.png", "png")
+
+    def build(self):
+        graph = DependencyGraph(self.content, self.static, self.public)
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(
+                self.content, self.template, self.public, graph=graph
+            )
+        return graph
+
+    def test_valid_links_are_not_reported(self):
+        self.write(
+            "content/index.md",
+            "# Home\n\n[Majesty](/majesty) [post](posts/first.html) [home](/)\n\n"
+            "![elf](/images/elf.png) [Site](https://example.com)",
+        )
+        self.write("content/majesty/index.md", "# Majesty")
+        self.write("content/posts/first.md", "# First\n\n[back](../index.html)")
+        self.assertEqual(find_broken_links(self.build()), [])
+
+    def test_broken_links_report_source_lines(self):
+        index = self.write(
+            "content/index.md",
+            "# Home\n\n[Missing](/missing)\n\n![orc](/images/orc.png)",
+        )
+        self.assertEqual(
+            find_broken_links(self.build()),
+            [
+                BrokenLink(os.path.normpath(index), 3, "/missing"),
+                BrokenLink(os.path.normpath(index), 5, "/images/orc.png"),
+            ],
+        )
+
+    def test_pages_skipped_by_this_build_are_not_missing(self):
+        self.write("content/index.md", "# Home")
+        majesty = self.write("content/majesty/index.md", "# Majesty\n\n[home](/)")
+        graph = DependencyGraph(self.content, self.static, self.public)
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(
+                os.path.join(self.content, "majesty"),
+                self.template,
+                os.path.join(self.public, "majesty"),
+                graph=graph,
+            )
+        self.assertEqual(list(graph.pages), [os.path.normpath(majesty)])
+        self.assertEqual(find_broken_links(graph), [])
+
+    def test_unchanged_pages_missing_from_the_graph_are_checked(self):
+        index = self.write("content/index.md", "# Home\n\n[Missing](/missing)")
+        manifest = BuildManifest()
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content, self.template, self.public, manifest)
+        graph = DependencyGraph(self.content, self.static, self.public)
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(
+                self.content, self.template, self.public, manifest, graph
+            )
+        self.assertEqual(
+            find_broken_links(graph),
+            [BrokenLink(os.path.normpath(index), 3, "/missing")],
+        )
+
+    def test_many_links(self):
+        graph = DependencyGraph(self.content, self.static, self.public)
+        references = PageReferences()
+        references.links = [(f"/page{i}", i) for i in range(20_000)]
+        graph.add_page(
+            os.path.join(self.content, "index.md"),
+            self.template,
+            os.path.join(self.public, "index.html"),
+            references,
+        )
+        for i in range(0, 20_000, 2):
+            graph.pages[f"page{i}.md"] = {
+                "dest_path": os.path.join(self.public, f"page{i}.html"),
+                "links": [],
+                "assets": [],
+            }
+        broken = find_broken_links(graph)
+        self.assertEqual(len(broken), 10_000)
+        self.assertEqual(broken[0].target, "/page1")
+
+
+if __name__ == "__main__":
+    unittest.main()
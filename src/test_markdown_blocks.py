@@ -1,9 +1,11 @@
+import io
 import unittest
 
 from markdown_blocks import (
     markdown_to_blocks,
     block_to_block_type,
     markdown_to_html_node,
+    MarkdownHTMLStream,
 )
 from htmlnode import ParentNode, LeafNode
 
@@ -260,3 +262,43 @@ this is paragraph text
             html,
             "<div><blockquote>This is a blockquote block</blockquote><p>this is paragraph text</p></div>",
         )
+
+    def test_fenced_code_with_blank_lines(self):
+        md = """
+```
+def main():
+
+    print("hello")
+```
+
+after the code
+"""
+
+        node = markdown_to_html_node(md)
+        html = node.to_html()
+        self.assertEqual(
+            html,
+            '<div><pre><code>def main():\n\n    print("hello")</code></pre><p>after the code</p></div>',
+        )
+
+    def test_closing_fence_ends_block(self):
+        md = "```\ndef f():\n\n    return 1\n```\nSee above."
+        self.assertEqual(
+            markdown_to_blocks(md),
+            ["```\ndef f():\n\n    return 1\n```", "See above."],
+        )
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            "<div><pre><code>def f():\n\n    return 1</code></pre>"
+            "<p>See above.</p></div>",
+        )
+
+    def test_unterminated_fence_splits_on_blank_lines(self):
+        md = "```\nnot closed\n\nparagraph"
+        self.assertEqual(markdown_to_blocks(md), ["```\nnot closed", "paragraph"])
+
+    def test_markdown_html_stream(self):
+        md = "# Title\n\n> quote\n\n1. one\n2. two\n\n```\na\n\nb\n```"
+        fp = io.StringIO()
+        MarkdownHTMLStream(iter(md.split("\n"))).write_html(fp)
+        self.assertEqual(fp.getvalue(), markdown_to_html_node(md).to_html())
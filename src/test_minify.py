@@ -0,0 +1,77 @@
+import io
+import unittest
+
+import minify
+from minify import HTMLMinifier, minify_css, minify_html
+
+
+class TestMinifyHTML(unittest.TestCase):
+    def test_drops_whitespace_around_block_tags(self):
+        self.assertEqual(
+            minify_html("<html>\n  <body>\n    <p>\n      Hello\n    </p>\n</body>\n"),
+            "<html><body><p>Hello</p></body>",
+        )
+
+    def test_keeps_one_space_between_inline_elements(self):
+        self.assertEqual(
+            minify_html("<p>a  <b>bold</b>\n<i>italic</i>   end</p>"),
+            "<p>a <b>bold</b> <i>italic</i> end</p>",
+        )
+
+    def test_preserves_pre_and_code(self):
+        pre = "<pre><code>def f():\n    return  1\n</code></pre>"
+        code = "<p><code>a  b</code></p>"
+        self.assertEqual(minify_html(f"{pre}\n{code}"), pre + code)
+
+    def test_removes_comments_and_keeps_scripts(self):
+        self.assertEqual(
+            minify_html("<p>a <!-- note --> b</p><script>if (a < b)  {}</script>"),
+            "<p>a b</p><script>if (a < b)  {}</script>",
+        )
+
+    def test_keeps_space_before_unmatched_angle_bracket(self):
+        self.assertEqual(
+            minify_html("<p>a < b and c > d</p>\n"), "<p>a < b and c > d</p>"
+        )
+        self.assertEqual(minify_html("<p>x</p> tail "), "<p>x</p>tail")
+
+    def test_streamed_chunks_match_whole_document(self):
+        html = (
+            "<!DOCTYPE html>\n<html>\n<body>\n  <article>\n"
+            "<p>Some <b>text</b> here</p>\n<pre><code>x\n  y</code></pre>\n"
+            "<script>var s = '</div>';</script>\n  </article>\n</body>\n</html>\n"
+        )
+        expected = minify_html(html)
+        for size in (1, 2, 5, 16):
+            output = io.StringIO()
+            minifier = HTMLMinifier(output)
+            minifier.writelines(html[i : i + size] for i in range(0, len(html), size))
+            minifier.close()
+            self.assertEqual(output.getvalue(), expected)
+
+    def test_minified_html_records_bytes_saved(self):
+        minify.enabled = True
+        self.addCleanup(setattr, minify, "enabled", False)
+        minify.stats.take_counts()
+        output = io.StringIO()
+        with minify.minified_html(output) as f:
+            f.write("<div>\n  <p>x</p>\n</div>\n")
+        self.assertEqual(output.getvalue(), "<div><p>x</p></div>")
+        self.assertEqual(minify.stats.take_counts(), (1, 24, 19))
+
+
+class TestMinifyCSS(unittest.TestCase):
+    def test_minify_css(self):
+        css = (
+            "/* theme */\nbody {\n    color: #fff;\n    font-family: \"Segoe  UI\", "
+            "Arial;\n}\n\nh1,\nh2 > a:hover {\n    margin: 0 auto;\n}\n"
+        )
+        self.assertEqual(
+            minify_css(css),
+            'body{color:#fff;font-family:"Segoe  UI",Arial}'
+            "h1,h2>a:hover{margin:0 auto}",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import stat
+import tempfile
+import unittest
+
+import output_writer
+from output_writer import open_output, write_if_changed
+
+
+class TestOutputWriter(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        self.path = os.path.join(self.dir, "pages", "index.html")
+        output_writer.stats.take_counts()
+        self.addCleanup(output_writer.stats.take_counts)
+
+    def set_old_mtime(self):
+        os.utime(self.path, ns=(0, 1_000_000_000))
+
+    def read(self):
+        with open(self.path) as f:
+            return f.read()
+
+    def test_open_output_writes_new_file(self):
+        with open_output(self.path) as f:
+            f.write("<p>hello</p>")
+        self.assertEqual(self.read(), "<p>hello</p>")
+        self.assertEqual(
+            stat.S_IMODE(os.stat(self.path).st_mode), output_writer.OUTPUT_MODE
+        )
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["index.html"])
+
+    def test_open_output_skips_unchanged_file(self):
+        with open_output(self.path) as f:
+            f.write("<p>hello</p>")
+        self.set_old_mtime()
+        with open_output(self.path) as f:
+            f.write("<p>hello</p>")
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 1_000_000_000)
+        self.assertEqual(output_writer.stats.take_counts(), (1, 1))
+
+    def test_open_output_replaces_changed_file(self):
+        with open_output(self.path) as f:
+            f.write("<p>hello</p>")
+        self.set_old_mtime()
+        with open_output(self.path) as f:
+            f.write("<p>world</p>")
+        self.assertEqual(self.read(), "<p>world</p>")
+        self.assertNotEqual(os.stat(self.path).st_mtime_ns, 1_000_000_000)
+
+    def test_open_output_discards_temp_file_on_error(self):
+        with self.assertRaises(ValueError):
+            with open_output(self.path) as f:
+                f.write("partial")
+                raise ValueError
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), [])
+
+    def test_write_if_changed(self):
+        self.assertTrue(write_if_changed(self.path, "<p>hello</p>"))
+        self.set_old_mtime()
+        self.assertFalse(write_if_changed(self.path, "<p>hello</p>"))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 1_000_000_000)
+        self.assertTrue(write_if_changed(self.path, "<p>hello!</p>"))
+        self.assertEqual(self.read(), "<p>hello!</p>")
+        self.assertEqual(output_writer.stats.take_counts(), (2, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import contextlib
+import io
+import os
+import unittest
+
+import block_cache
+import profiling
+from build_manifest import BuildManifest
+from pipeline import generate_pages_async
+from test_support import TempTreeTestCase
+
+
+class TestGeneratePagesAsync(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.public = os.path.join(self.root, "public")
+        self.template = self.write(
+            "template.html", "<title>{{ Title }}</title>{{ Content }}"
+        )
+        for i in range(20):
+            self.write(
+                f"content/section{i % 3}/page{i}.md", f"# Page {i}\n\nText {i}"
+            )
+
+    def generate(self, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_async(self.content, self.template, self.public, **kwargs)
+
+    def test_generate_pages_async(self):
+        self.generate(queue_size=2)
+        self.assertEqual(
+            self.read("public/section1/page4.html"),
+            "<title>Page 4</title><div><h1>Page 4</h1><p>Text 4</p></div>",
+        )
+
+    def test_generate_pages_async_with_process_pool(self):
+        self.generate(workers=2)
+        self.assertEqual(
+            self.read("public/section2/page5.html"),
+            "<title>Page 5</title><div><h1>Page 5</h1><p>Text 5</p></div>",
+        )
+
+    def test_process_pool_counts_reach_the_parent(self):
+        cache = block_cache.configure()
+        self.addCleanup(block_cache.disable)
+        profiling.profiler.enabled = True
+        self.addCleanup(setattr, profiling.profiler, "enabled", False)
+        self.addCleanup(profiling.profiler.reset)
+        self.generate(workers=2)
+        self.assertEqual(cache.hits + cache.misses, 40)
+        self.assertEqual(len(profiling.profiler.pages), 20)
+        self.assertIn("blocks", profiling.profiler.stages)
+
+    def test_process_pool_reports_failures(self):
+        self.write("content/untitled.md", "No title")
+        with self.assertRaises(RuntimeError):
+            self.generate(workers=2)
+
+    def test_generate_pages_async_reports_failures(self):
+        self.write("content/untitled.md", "No title")
+        with self.assertRaises(RuntimeError):
+            self.generate()
+        self.assertTrue(
+            os.path.exists(os.path.join(self.public, "section0", "page0.html"))
+        )
+
+    def test_generate_pages_async_records_manifest(self):
+        manifest = BuildManifest()
+        self.generate(manifest=manifest)
+        self.assertEqual(len(manifest.pages), 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
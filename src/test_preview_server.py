@@ -0,0 +1,87 @@
+import os
+import threading
+import unittest
+import urllib.error
+import urllib.request
+
+from preview_server import PreviewSite, RenderCache, create_server
+from test_support import TempTreeTestCase
+
+
+class TestRenderCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = RenderCache(maxsize=2)
+        cache.put("a", 1, b"a")
+        cache.put("b", 1, b"b")
+        self.assertEqual(cache.get("a", 1), b"a")
+        cache.put("c", 1, b"c")
+        self.assertIsNone(cache.get("b", 1))
+        self.assertEqual(cache.get("a", 1), b"a")
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_stale_version_misses(self):
+        cache = RenderCache()
+        cache.put("a", 1, b"a")
+        self.assertIsNone(cache.get("a", 2))
+
+
+class TestPreviewSite(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write("content/index.md", "# Home")
+        self.write("content/majesty/index.md", "# Majesty")
+        self.write("content/about.md", "# About")
+        self.write("static/index.css", "body {}")
+        self.site = PreviewSite(
+            self.path("content"), self.path("static"), self.path("template.html")
+        )
+
+    def test_source_for(self):
+        cases = {
+            "/": ("page", self.path("content/index.md")),
+            "/index.html": ("page", self.path("content/index.md")),
+            "/majesty": ("page", self.path("content/majesty/index.md")),
+            "/majesty/": ("page", self.path("content/majesty/index.md")),
+            "/about.html": ("page", self.path("content/about.md")),
+            "/about": ("page", self.path("content/about.md")),
+            "/index.css?v=1": ("static", self.path("static/index.css")),
+            "/missing": (None, None),
+            "/../template.html": (None, None),
+        }
+        for url, expected in cases.items():
+            self.assertEqual(self.site.source_for(url), expected, url)
+
+    def test_render_is_cached_until_source_changes(self):
+        page = self.path("content/index.md")
+        self.assertEqual(
+            self.site.render(page), b"<title>Home</title><div><h1>Home</h1></div>"
+        )
+        self.site.render(page)
+        self.assertEqual((self.site.cache.hits, self.site.cache.misses), (1, 1))
+        self.write("content/index.md", "# Home page")
+        os.utime(page, ns=(0, os.stat(page).st_mtime_ns + 1))
+        self.assertIn(b"Home page", self.site.render(page))
+
+    def test_server(self):
+        server = create_server(self.site, host="127.0.0.1", port=0)
+        self.addCleanup(server.server_close)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.shutdown)
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        with urllib.request.urlopen(f"{base}/majesty") as response:
+            self.assertEqual(
+                response.headers["Content-Type"], "text/html; charset=utf-8"
+            )
+            self.assertIn(b"<h1>Majesty</h1>", response.read())
+        with urllib.request.urlopen(f"{base}/index.css") as response:
+            self.assertEqual(response.headers["Content-Type"], "text/css")
+            self.assertEqual(response.read(), b"body {}")
+        with self.assertRaises(urllib.error.HTTPError) as cm:
+            urllib.request.urlopen(f"{base}/missing")
+        cm.exception.close()
+        self.assertEqual(cm.exception.code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
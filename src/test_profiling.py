@@ -0,0 +1,64 @@
+import time
+import unittest
+
+import profiling
+from profiling import Profiler, profiled
+
+
+@profiled("outer")
+def outer():
+    time.sleep(0.01)
+    inner()
+
+
+@profiled("inner")
+def inner():
+    time.sleep(0.02)
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        profiling.profiler.reset()
+        self.addCleanup(profiling.profiler.reset)
+        self.addCleanup(setattr, profiling.profiler, "enabled", False)
+
+    def test_disabled_profiler_records_nothing(self):
+        outer()
+        with profiling.stage("read"), profiling.page("index.md"):
+            pass
+        self.assertEqual(profiling.profiler.stages, {})
+        self.assertEqual(profiling.profiler.pages, {})
+
+    def test_nested_stages_record_exclusive_time(self):
+        profiling.profiler.enabled = True
+        outer()
+        outer_seconds, outer_calls = profiling.profiler.stages["outer"]
+        inner_seconds, inner_calls = profiling.profiler.stages["inner"]
+        self.assertEqual((outer_calls, inner_calls), (1, 1))
+        self.assertGreaterEqual(inner_seconds, 0.02)
+        self.assertLess(outer_seconds, 0.02)
+
+    def test_page_timing(self):
+        profiling.profiler.enabled = True
+        with profiling.page("index.md"):
+            with profiling.stage("read"):
+                pass
+        self.assertIn("index.md", profiling.profiler.pages)
+        self.assertEqual(profiling.profiler.stages["read"][1], 1)
+
+    def test_merge_and_summary(self):
+        worker = Profiler()
+        worker.stages = {"inline": (0.5, 10)}
+        worker.pages = {"index.md": 0.75}
+        profiler = Profiler()
+        profiler.stages = {"inline": (0.25, 5), "read": (0.25, 1)}
+        profiler.merge(worker.snapshot())
+        self.assertEqual(profiler.stages["inline"], (0.75, 15))
+        self.assertEqual(profiler.pages, {"index.md": 0.75})
+        summary = profiler.summary()
+        self.assertIn("inline", summary)
+        self.assertIn("0.7500s index.md", summary)
+
+
+if __name__ == "__main__":
+    unittest.main()
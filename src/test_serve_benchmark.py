@@ -0,0 +1,25 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from serve_benchmark import load
+from static_server import ServerThread, StaticServer, StaticSite
+
+
+class TestServeBenchmark(unittest.TestCase):
+    def test_load_counts_responses_by_status(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "index.html"), "w") as f:
+                f.write("<p>home</p>")
+            server = ServerThread(StaticServer(StaticSite(tmp)), "127.0.0.1", 0)
+            try:
+                counts = asyncio.run(load(server.port, ["/", "/missing"], 2, 0.1))
+            finally:
+                server.stop()
+        self.assertEqual(set(counts), {200, 404})
+        self.assertLessEqual(abs(counts[200] - counts[404]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import gzip
+import http.client
+import os
+import unittest
+import urllib.error
+import urllib.request
+
+from compress import compress_file
+from static_server import (
+    ServerThread,
+    StaticServer,
+    StaticSite,
+    choose_encoding,
+    resolve_path,
+)
+from test_support import TempTreeTestCase
+
+
+class TestStaticServer(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.index = self.write("index.html", "<p>home</p>" * 50)
+        self.majesty = self.write("majesty/index.html", "<p>majesty</p>")
+        self.about = self.write("about.html", "<p>about</p>")
+        compress_file(self.index, ["gzip"])
+
+    def test_resolve_path(self):
+        cases = {
+            "/": self.index,
+            "/majesty": self.majesty,
+            "/majesty/": self.majesty,
+            "/about": self.about,
+            "/about.html?x=1": self.about,
+            "/../index.html": self.index,
+            "/missing": None,
+        }
+        for url, expected in cases.items():
+            self.assertEqual(resolve_path(self.root, url), expected, url)
+
+    def test_choose_encoding(self):
+        self.assertEqual(choose_encoding("gzip, deflate", self.index), "gzip")
+        self.assertEqual(choose_encoding("br;q=1.0, *;q=0.5", self.index), "gzip")
+        self.assertIsNone(choose_encoding("gzip;q=0", self.index))
+        self.assertIsNone(choose_encoding("", self.index))
+        self.assertIsNone(choose_encoding("gzip", self.about))
+
+    def test_stale_sidecar_is_ignored(self):
+        os.utime(self.index, ns=(0, os.stat(self.index).st_mtime_ns + 1))
+        self.assertIsNone(choose_encoding("gzip", self.index))
+
+    def start_server(self, site=None):
+        server = ServerThread(
+            StaticServer(site or StaticSite(self.root)), "127.0.0.1", 0
+        )
+        self.addCleanup(server.stop)
+        return server.port
+
+    def test_server_negotiates_encoding(self):
+        base = f"http://127.0.0.1:{self.start_server()}"
+        request = urllib.request.Request(
+            f"{base}/", headers={"Accept-Encoding": "gzip"}
+        )
+        with urllib.request.urlopen(request) as response:
+            self.assertEqual(response.headers["Content-Encoding"], "gzip")
+            self.assertEqual(response.headers["Vary"], "Accept-Encoding")
+            self.assertEqual(gzip.decompress(response.read()), b"<p>home</p>" * 50)
+        with urllib.request.urlopen(f"{base}/majesty") as response:
+            self.assertIsNone(response.headers["Content-Encoding"])
+            self.assertEqual(
+                response.headers["Content-Type"], "text/html; charset=utf-8"
+            )
+            self.assertEqual(response.read(), b"<p>majesty</p>")
+        with self.assertRaises(urllib.error.HTTPError) as cm:
+            urllib.request.urlopen(f"{base}/missing")
+        cm.exception.close()
+        self.assertEqual(cm.exception.code, 404)
+
+    def test_conditional_requests_and_keep_alive(self):
+        connection = http.client.HTTPConnection("127.0.0.1", self.start_server())
+        self.addCleanup(connection.close)
+        connection.request("GET", "/about")
+        response = connection.getresponse()
+        self.assertEqual(response.read(), b"<p>about</p>")
+        etag = response.headers["ETag"]
+        last_modified = response.headers["Last-Modified"]
+        self.assertEqual(response.headers["Connection"], "keep-alive")
+        sock = connection.sock
+        for headers in ({"If-None-Match": etag}, {"If-Modified-Since": last_modified}):
+            connection.request("GET", "/about", headers=headers)
+            response = connection.getresponse()
+            self.assertEqual(response.status, 304)
+            self.assertEqual(response.read(), b"")
+        connection.request("HEAD", "/about")
+        response = connection.getresponse()
+        self.assertEqual(response.headers["Content-Length"], "12")
+        self.assertEqual(response.read(), b"")
+        self.assertIs(connection.sock, sock)
+
+    def test_large_files_are_streamed_from_disk(self):
+        data = os.urandom(256 * 1024)
+        with open(os.path.join(self.root, "large.bin"), "wb") as f:
+            f.write(data)
+        site = StaticSite(self.root)
+        port = self.start_server(site)
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/large.bin") as response:
+            self.assertEqual(response.read(), data)
+        self.assertIsNone(site.lookup("/large.bin").data)
+        self.assertEqual(site.lookup("/about").data, b"<p>about</p>")
+
+    def test_site_revalidates_changed_files(self):
+        site = StaticSite(self.root, revalidate=0)
+        first = site.lookup("/about")
+        self.assertIs(site.lookup("/about"), first)
+        self.write("about.html", "<p>about us</p>")
+        os.utime(self.about, ns=(0, first.mtime_ns + 1))
+        second = site.lookup("/about")
+        self.assertEqual(second.data, b"<p>about us</p>")
+        self.assertNotEqual(second.etag, first.etag)
+        self.assertEqual(site.cached_bytes, len(second.data))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,26 @@
+import os
+import tempfile
+import unittest
+
+
+class TempTreeTestCase(unittest.TestCase):
+    # Each test gets its own temporary directory; names are relative to it
+    # and use "/" as the separator.
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name
+
+    def path(self, name):
+        return os.path.join(self.root, *name.split("/"))
+
+    def write(self, name, data):
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb" if isinstance(data, bytes) else "w") as f:
+            f.write(data)
+        return path
+
+    def read(self, name):
+        with open(self.path(name)) as f:
+            return f.read()
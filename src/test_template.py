@@ -0,0 +1,62 @@
+import io
+import os
+import tempfile
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from template import Template, clear_template_cache, load_template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_parse(self):
+        template = Template("<title>{{ Title }}</title><main>{{Content}}</main>")
+        self.assertEqual(template.segments, ["<title>", "</title><main>", "</main>"])
+        self.assertEqual(
+            template.slots, [("Title", "{{ Title }}"), ("Content", "{{Content}}")]
+        )
+
+    def test_render(self):
+        template = Template("<title>{{ Title }}</title>{{ Content }}")
+        html = template.render(
+            {"Title": "Home", "Content": ParentNode("p", [LeafNode("Hello")])}
+        )
+        self.assertEqual(html, "<title>Home</title><p>Hello</p>")
+
+    def test_render_keeps_unknown_placeholders(self):
+        template = Template("{{ Title }} by {{ Author }}")
+        self.assertEqual(template.render({"Title": "Home"}), "Home by {{ Author }}")
+
+    def test_write(self):
+        template = Template(
+            "<h1>{{ Title }}</h1>{{ Content }}<footer>{{ Title }}</footer>"
+        )
+        fp = io.StringIO()
+        template.write(fp, {"Title": "Home", "Content": LeafNode("Hi", "p")})
+        self.assertEqual(fp.getvalue(), "<h1>Home</h1><p>Hi</p><footer>Home</footer>")
+
+
+class TestLoadTemplate(unittest.TestCase):
+    def setUp(self):
+        clear_template_cache()
+        self.addCleanup(clear_template_cache)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "template.html")
+        with open(self.path, "w") as f:
+            f.write("{{ Content }}")
+
+    def test_load_template_is_cached(self):
+        self.assertIs(load_template(self.path), load_template(self.path))
+
+    def test_load_template_reloads_after_change(self):
+        template = load_template(self.path)
+        with open(self.path, "w") as f:
+            f.write("<main>{{ Content }}</main>")
+        os.utime(self.path, ns=(0, os.stat(self.path).st_mtime_ns + 1))
+        reloaded = load_template(self.path)
+        self.assertIsNot(reloaded, template)
+        self.assertEqual(reloaded.segments, ["<main>", "</main>"])
+
+
+if __name__ == "__main__":
+    unittest.main()
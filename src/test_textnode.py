@@ -40,6 +40,12 @@ class TestTextNode(unittest.TestCase):
             node.__repr__(), "TextNode(This is a text node, TextType.BOLD, None)"
         )
 
+    def test_has_no_instance_dict(self):
+        node = TextNode("This is a text node", TextType.BOLD)
+        self.assertFalse(hasattr(node, "__dict__"))
+        with self.assertRaises(AttributeError):
+            node.extra = True
+
 
 class TestTextNodeToLeafNode(unittest.TestCase):
     def test_bold_text_node_to_html_node(self):
@@ -0,0 +1,104 @@
+import contextlib
+import io
+import os
+import unittest
+
+from test_support import TempTreeTestCase
+from watch import InotifyWatcher, PollingWatcher, rebuild, wait_for_changes
+
+
+class TestWatchers(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.page = self.write("content/index.md", "# Home")
+
+    def check_watcher(self, watcher):
+        self.addCleanup(watcher.close)
+        self.assertEqual(watcher.changes(timeout=0), set())
+        self.write("content/index.md", "# Home page")
+        new_page = self.write("content/about.md", "# About")
+        self.assertEqual(
+            wait_for_changes(watcher, debounce=0.05), {self.page, new_page}
+        )
+
+    def test_polling_watcher(self):
+        self.check_watcher(PollingWatcher([self.content], interval=0.01))
+
+    def test_inotify_watcher(self):
+        try:
+            watcher = InotifyWatcher([self.content])
+        except (AttributeError, OSError):
+            self.skipTest("inotify is not available")
+        self.check_watcher(watcher)
+
+
+class TestRebuild(TempTreeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.public = os.path.join(self.root, "public")
+        self.template = self.write("template.html", "{{ Content }}")
+        self.write("content/index.md", "# Home")
+        self.write("content/posts/first.md", "# First")
+        self.write("static/index.css", "body {}")
+
+    def rebuild(self, *changed):
+        with contextlib.redirect_stdout(io.StringIO()):
+            rebuild(
+                set(changed), self.content, self.static, self.template, self.public
+            )
+
+    def test_rebuild_changed_page_only(self):
+        page = os.path.join(self.content, "posts", "first.md")
+        self.rebuild(page)
+        self.assertEqual(
+            self.read("public/posts/first.html"), "<div><h1>First</h1></div>"
+        )
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.html")))
+
+    def test_rebuild_deleted_page(self):
+        page = os.path.join(self.content, "index.md")
+        self.rebuild(page)
+        os.remove(page)
+        self.rebuild(page)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.html")))
+
+    def test_rebuild_static_file(self):
+        self.rebuild(os.path.join(self.static, "index.css"))
+        self.assertEqual(self.read("public/index.css"), "body {}")
+
+    def test_rebuild_template_renders_every_page(self):
+        self.rebuild(self.template)
+        self.assertEqual(self.read("public/index.html"), "<div><h1>Home</h1></div>")
+        self.assertEqual(
+            self.read("public/posts/first.html"), "<div><h1>First</h1></div>"
+        )
+
+    def test_rebuild_template_with_deleted_page(self):
+        page = os.path.join(self.content, "index.md")
+        self.rebuild(page)
+        os.remove(page)
+        self.rebuild(self.template, page)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.html")))
+        self.assertEqual(
+            self.read("public/posts/first.html"), "<div><h1>First</h1></div>"
+        )
+
+    def test_rebuild_mixes_relative_and_absolute_paths(self):
+        page = os.path.relpath(os.path.join(self.content, "index.md"))
+        self.rebuild("README.md", page)
+        self.assertEqual(self.read("public/index.html"), "<div><h1>Home</h1></div>")
+
+    def test_rebuild_skips_draft_pages(self):
+        draft = self.write("content/secret.md", "---\ndraft: true\n---\n# Secret")
+        self.write("public/secret.html", "published before")
+        self.rebuild(draft)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "secret.html")))
+        self.rebuild(self.template)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "secret.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,13 @@
 from enum import Enum
 
+import image_pipeline
 from htmlnode import LeafNode
 
 TextType = Enum("TextType", ["TEXT", "BOLD", "ITALIC", "CODE", "LINK", "IMAGE"])
 
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
 
     def __init__(self, text, text_type, url=None):
         self.text = text
@@ -26,18 +28,25 @@ class TextNode:
 
 
 def text_node_to_html_node(text_node: TextNode):
-    match text_node.text_type:
+    return text_to_html_node(text_node.text, text_node.text_type, text_node.url)
+
+
+def text_to_html_node(text, text_type, url=None):
+    match text_type:
         case TextType.TEXT:
-            return LeafNode(text_node.text)
+            return LeafNode(text)
         case TextType.BOLD:
-            return LeafNode(text_node.text, "b")
+            return LeafNode(text, "b")
         case TextType.ITALIC:
-            return LeafNode(text_node.text, "i")
+            return LeafNode(text, "i")
         case TextType.CODE:
-            return LeafNode(text_node.text, "code")
+            return LeafNode(text, "code")
         case TextType.LINK:
-            return LeafNode(text_node.text, "a", {"href": text_node.url})
+            return LeafNode(text, "a", {"href": url})
         case TextType.IMAGE:
-            return LeafNode("", "img", {"src": text_node.url, "alt": text_node.text})
+            props = {"src": url, "alt": text}
+            if image_pipeline.active_pipeline is not None:
+                props.update(image_pipeline.active_pipeline.attributes(url))
+            return LeafNode("", "img", props)
         case _:
-            raise ValueError(f"Unrecognised text type: {text_node.text_type}")
+            raise ValueError(f"Unrecognised text type: {text_type}")
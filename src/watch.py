@@ -0,0 +1,252 @@
+import argparse
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+import front_matter
+from dependency_graph import is_within
+from generate_content import (
+    copy_file,
+    find_pages,
+    generate_page,
+    is_unpublished_draft,
+    page_dest_path,
+    skip_draft,
+    sync_dir,
+)
+from static_server import ServerThread, StaticServer, StaticSite
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_ISDIR = 0x40000000
+INOTIFY_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+)
+INOTIFY_EVENT = struct.Struct("iIII")
+
+
+def take_snapshot(paths):
+    snapshot = {}
+    for path in paths:
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            snapshot[os.path.normpath(path)] = (stat.st_mtime_ns, stat.st_size)
+        for dir_path, _, file_names in os.walk(path):
+            for file_name in file_names:
+                file_path = os.path.normpath(os.path.join(dir_path, file_name))
+                try:
+                    stat = os.stat(file_path)
+                except FileNotFoundError:
+                    continue
+                snapshot[file_path] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+class PollingWatcher:
+    def __init__(self, paths, interval=0.05):
+        self.paths = paths
+        self.interval = interval
+        self.snapshot = take_snapshot(paths)
+
+    def changes(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            snapshot = take_snapshot(self.paths)
+            changed = {
+                path
+                for path in snapshot.keys() | self.snapshot.keys()
+                if snapshot.get(path) != self.snapshot.get(path)
+            }
+            self.snapshot = snapshot
+            remaining = deadline - time.monotonic()
+            if changed or remaining <= 0:
+                return changed
+            time.sleep(min(self.interval, remaining))
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    def __init__(self, paths):
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}
+        for path in paths:
+            if os.path.isdir(path):
+                self._watch_tree(path)
+            else:
+                self._watch_dir(os.path.dirname(path) or ".")
+
+    def _watch_dir(self, path):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), INOTIFY_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        self.watches[wd] = path
+
+    def _watch_tree(self, path):
+        for dir_path, _, _ in os.walk(path):
+            self._watch_dir(dir_path)
+
+    def changes(self, timeout):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = set()
+        data = os.read(self.fd, 64 * 1024)
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, name_length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = data[offset : offset + name_length].rstrip(b"\0")
+            offset += name_length
+            if wd not in self.watches:
+                continue
+            path = os.path.normpath(os.path.join(self.watches[wd], os.fsdecode(name)))
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self._watch_tree(path)
+                    changed.update(take_snapshot([path]))
+            else:
+                changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+def create_watcher(paths, poll=False, interval=0.05):
+    if not poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(paths)
+        except (AttributeError, OSError):
+            pass
+    return PollingWatcher(paths, interval)
+
+
+def wait_for_changes(watcher, debounce):
+    changed = watcher.changes(timeout=3600)
+    while changed:
+        more = watcher.changes(timeout=debounce)
+        if not more:
+            break
+        changed |= more
+    return changed
+
+
+def render_page(from_path, template_path, dest_path):
+    if is_unpublished_draft(from_path):
+        skip_draft(from_path, dest_path)
+    else:
+        generate_page(from_path, template_path, dest_path)
+
+
+def rebuild(changed, content_dir, static_dir, template_path, dest_dir):
+    # Watched paths may be given relative or absolute, so compare them all
+    # as absolute paths.
+    changed = {os.path.abspath(path) for path in changed}
+    content_dir = os.path.abspath(content_dir)
+    static_dir = os.path.abspath(static_dir)
+    if os.path.abspath(template_path) in changed:
+        for from_path, dest_path in find_pages(content_dir, dest_dir):
+            render_page(from_path, template_path, dest_path)
+        # Deleted pages still need their output removed below.
+        changed = {
+            path
+            for path in changed
+            if not (is_within(path, content_dir) and os.path.exists(path))
+        }
+
+    for path in sorted(changed):
+        if is_within(path, content_dir):
+            dest_path = page_dest_path(path, content_dir, dest_dir)
+            if os.path.isfile(path):
+                render_page(path, template_path, dest_path)
+            elif os.path.exists(dest_path):
+                print(f"Deleting {dest_path}")
+                os.remove(dest_path)
+        elif is_within(path, static_dir):
+            dest_path = os.path.join(dest_dir, os.path.relpath(path, static_dir))
+            if os.path.isfile(path):
+                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+                print(f"Copying {path} -> {dest_path}")
+                copy_file(path, dest_path)
+            elif os.path.exists(dest_path):
+                print(f"Deleting {dest_path}")
+                os.remove(dest_path)
+
+
+def serve(directory, port):
+    # Rebuilds rewrite files in place, so check them on every request.
+    server = ServerThread(StaticServer(StaticSite(directory, revalidate=0)), "", port)
+    print(f"Serving {directory} on http://localhost:{port}")
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild the site on changes")
+    parser.add_argument("--content", default="content")
+    parser.add_argument("--static", default="static")
+    parser.add_argument("--template", default="template.html")
+    parser.add_argument("--dest", default="public")
+    parser.add_argument(
+        "--poll", action="store_true", help="poll for changes instead of inotify"
+    )
+    parser.add_argument("--interval", type=float, default=0.05)
+    parser.add_argument("--debounce", type=float, default=0.02)
+    parser.add_argument("--serve", type=int, metavar="PORT")
+    parser.add_argument(
+        "--drafts",
+        action="store_true",
+        help="also build pages whose front matter sets draft: true",
+    )
+    args = parser.parse_args(argv)
+    front_matter.include_drafts = args.drafts
+
+    sync_dir(args.static, args.dest)
+    for from_path, dest_path in find_pages(args.content, args.dest):
+        render_page(from_path, args.template, dest_path)
+    if args.serve is not None:
+        serve(args.dest, args.serve)
+
+    watcher = create_watcher(
+        [args.content, args.static, args.template], args.poll, args.interval
+    )
+    print(f"Watching for changes with {type(watcher).__name__}")
+    try:
+        while True:
+            changed = wait_for_changes(watcher, args.debounce)
+            if not changed:
+                continue
+            start = time.perf_counter()
+            try:
+                rebuild(changed, args.content, args.static, args.template, args.dest)
+            except Exception as e:
+                print(f"Rebuild failed: {type(e).__name__}: {e}")
+                continue
+            print(f"Rebuilt in {(time.perf_counter() - start) * 1000:.1f} ms")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+
+if __name__ == "__main__":
+    main()